@@ -52,4 +52,232 @@ e. **Convergence Check**
 
 **Begin now.**
 
-"""
\ No newline at end of file
+"""
+# ──────────────────────────────────────────────────────────────────────────────
+# Reference driver for the procedure above
+# ──────────────────────────────────────────────────────────────────────────────
+
+import asyncio
+import functools
+import math
+import random
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+@dataclass
+class _Node:
+    """One speculative MH step: the state it starts from, its proposal and score."""
+    state: "asyncio.Future[str]"
+    candidate: "asyncio.Future[str]"
+    score: "Optional[asyncio.Future[float]]"
+    children: Dict[bool, "_Node"] = field(default_factory=dict)
+
+
+def _discard(node: _Node) -> None:
+    """Cancel a speculative subtree that the chain did not take."""
+    for fut in (node.candidate, node.score):
+        if fut is None:
+            continue
+        fut.cancel()
+        if fut.done() and not fut.cancelled():
+            fut.exception()  # mark as retrieved
+    for child in node.children.values():
+        _discard(child)
+
+
+@functools.lru_cache(maxsize=None)
+def _correction_distribution() -> Tuple[np.ndarray, np.ndarray]:
+    """Grid and weights of the correction X_c with N(0, 1) + X_c ~ Logistic(0, 1).
+
+    Computed once by ridge-regularised deconvolution of the logistic density
+    by the unit Gaussian, as in Seita et al.'s minibatch acceptance test.
+    """
+    x = np.linspace(-10.0, 10.0, 801)
+    dx = x[1] - x[0]
+    gauss = np.exp(-0.5 * (x[:, None] - x[None, :]) ** 2) / math.sqrt(2 * math.pi) * dx
+    logistic = np.exp(-x) / (1 + np.exp(-x)) ** 2
+    w = np.linalg.solve(gauss.T @ gauss + 1e-4 * np.eye(len(x)), gauss.T @ logistic)
+    w = np.clip(w, 0.0, None)
+    return x, w / w.sum()
+
+
+def _barker_test(d: np.ndarray, n_items: int, beta: float,
+                 rng: np.random.Generator) -> Optional[bool]:
+    """Barker accept/reject from per-item score differences *d* on a minibatch.
+
+    The test accepts iff beta * mean(d) + noise > 0, where the noise makes the
+    total perturbation exactly Logistic(0, 1) -- i.e. acceptance probability
+    sigmoid(beta * dS).  Returns None while the minibatch estimate is still
+    too noisy (std > 1) to be corrected.
+    """
+    b = len(d)
+    delta = beta * float(d.mean())
+    if b >= n_items:
+        return delta + rng.logistic() > 0
+    if b < 2:
+        return None
+    sd = beta * float(d.std(ddof=1)) / math.sqrt(b) * math.sqrt(1 - b / n_items)
+    if sd > 1.0:
+        return None
+    x, w = _correction_distribution()
+    x_c = rng.choice(x, p=w) + rng.uniform(-0.5, 0.5) * (x[1] - x[0])
+    return delta + rng.normal(0.0, math.sqrt(1.0 - sd * sd)) + x_c > 0
+
+
+async def _c2c2_async(initial: str,
+                      propose: Callable[[str], str],
+                      S: Optional[Callable[[str], float]],
+                      T: int,
+                      beta: float,
+                      eps: float,
+                      prefetch_depth: int,
+                      rng: random.Random,
+                      verbose: bool,
+                      items: Optional[Sequence[Any]],
+                      S_item: Optional[Callable[[str, Any], float]],
+                      batch_size: int) -> Tuple[str, float]:
+    """Async core of :func:`c2c2` with a prefetch tree of depth *prefetch_depth*."""
+
+    async def propose_from(state: "asyncio.Future[str]") -> str:
+        return await asyncio.to_thread(propose, await state)
+
+    async def score_of(candidate: "asyncio.Future[str]") -> float:
+        return await asyncio.to_thread(S, await candidate)
+
+    def spawn(state: "asyncio.Future[str]") -> _Node:
+        candidate = asyncio.ensure_future(propose_from(state))
+        # Minibatch mode scores lazily inside the Barker test instead
+        score = asyncio.ensure_future(score_of(candidate)) if items is None else None
+        return _Node(state, candidate, score)
+
+    # Per-candidate item scores, so the current c is never re-scored
+    item_scores: Dict[str, Dict[int, float]] = {}
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+
+    async def scores_on(text: str, idx: Sequence[int]) -> np.ndarray:
+        known = item_scores.setdefault(text, {})
+        missing = [i for i in idx if i not in known]
+        fresh = await asyncio.gather(*[asyncio.to_thread(S_item, text, items[i]) for i in missing])
+        known.update(zip(missing, fresh))
+        return np.array([known[i] for i in idx], dtype=np.float64)
+
+    async def barker(c_cur: str, c_prop: str) -> Tuple[bool, float, int]:
+        """Grow a random minibatch until the Barker test can decide."""
+        order = np_rng.permutation(len(items))
+        b = min(batch_size, len(items))
+        while True:
+            idx = order[:b].tolist()
+            d = await scores_on(c_prop, idx) - await scores_on(c_cur, idx)
+            decision = _barker_test(d, len(items), beta, np_rng)
+            if decision is not None:
+                return decision, float(d.mean()), b
+            b = min(2 * b, len(items))
+
+    # A rejection leaves S(c) unchanged, which ends the run whenever eps > 0,
+    # so the reject branch is only worth speculating on when eps <= 0.
+    branches = (True, False) if eps <= 0 else (True,)
+
+    def expand(node: _Node, depth: int) -> None:
+        if depth <= 1:
+            return
+        for accepted in branches:
+            if accepted not in node.children:
+                node.children[accepted] = spawn(node.candidate if accepted else node.state)
+            expand(node.children[accepted], depth - 1)
+
+    # 1. Initialization
+    c = initial
+    # In minibatch mode S(c) is tracked relative to the initial candidate
+    s_c = await asyncio.to_thread(S, c) if items is None else 0.0
+    s_prev = s_c
+    start = asyncio.get_running_loop().create_future()
+    start.set_result(c)
+    root = spawn(start)
+    hits = rounds = 0
+
+    # 2. Iterative refinement
+    try:
+        for t in range(1, T + 1):
+            rounds = t
+            expand(root, prefetch_depth)
+            if items is None:
+                c_prop, s_prop = await root.candidate, await root.score
+                delta = s_prop - s_c
+                alpha = 1.0 if delta >= 0 else math.exp(beta * delta)
+                accepted = rng.random() < alpha
+                note = ""
+            else:
+                c_prop = await root.candidate
+                accepted, delta, scored = await barker(c, c_prop)
+                s_prop = s_c + delta
+                note = f", {scored}/{len(items)} items"
+            if accepted:
+                c, s_c = c_prop, s_prop
+            if items is not None:
+                item_scores = {c: item_scores.get(c, {})}
+            if verbose:
+                print(f"  {'+' if accepted else '-'} Round {t} "
+                      f"{'accepted' if accepted else 'rejected'} (dS={delta:.3f}{note})")
+
+            for branch, child in root.children.items():
+                if branch != accepted:
+                    _discard(child)
+            nxt = root.children.get(accepted)
+            if nxt is not None:
+                hits += 1
+            root = nxt or spawn(root.candidate if accepted else root.state)
+
+            if abs(s_c - s_prev) < eps:
+                if verbose:
+                    print(f"Converged: |dS|={abs(s_c - s_prev):.4f} < eps={eps}")
+                break
+            s_prev = s_c
+    finally:
+        _discard(root)
+
+    if verbose and prefetch_depth > 1:
+        print(f"Prefetch hits: {hits}/{rounds}")
+    # 3. Return final answer
+    if items is not None:
+        s_c = float(np.mean(await scores_on(c, range(len(items)))))
+    return c, s_c
+
+
+def c2c2(initial: str,
+         propose: Callable[[str], str],
+         S: Optional[Callable[[str], float]],
+         T: int = 5,
+         beta: float = 1.0,
+         eps: float = 0.01,
+         prefetch_depth: int = 1,
+         rng: Optional[random.Random] = None,
+         verbose: bool = False,
+         items: Optional[Sequence[Any]] = None,
+         S_item: Optional[Callable[[str, Any], float]] = None,
+         batch_size: int = 16) -> Tuple[str, float]:
+    """Run the single-chain C2C procedure and return (c, S(c)).
+
+    *propose* maps the current solution to a refined proposal and *S* scores
+    a candidate; both are usually LLM calls and run in worker threads.  With
+    ``prefetch_depth=k > 1`` the proposals (and their scores) for the next
+    ``k - 1`` rounds are launched speculatively along the possible
+    accept/reject outcomes, and the branch not taken is discarded after each
+    MH test.  The chain itself is unchanged; only wall-clock time drops.
+
+    When S(c) is an average of ``S_item(c, item)`` over *items*, pass those
+    instead of *S*: each MH step then runs Barker's minibatch test, scoring
+    only as many items (starting at *batch_size*, doubling) as needed for the
+    estimate of beta * dS to have std <= 1.  Larger beta therefore means larger
+    minibatches.  Note that Barker's rule accepts with probability
+    sigmoid(beta * dS) rather than min(1, exp(beta * dS)).
+    """
+    if items is None and S is None:
+        raise ValueError("either S or items with S_item is required")
+    if items is not None and S_item is None:
+        raise ValueError("S_item is required when items are given")
+    return asyncio.run(_c2c2_async(initial, propose, S, T, beta, eps,
+                                   max(1, prefetch_depth), rng or random.Random(), verbose,
+                                   items, S_item, max(2, batch_size)))
@@ -0,0 +1,66 @@
+"""
+Persistent cache of technique answers, keyed by (technique, hyperparameters, question).
+
+Evaluation scripts re-run the same techniques on the same fixed questions;
+a hit returns the stored answer, API call count and solve time without any
+API call. Backed by one sqlite file in WAL mode, so concurrent readers never
+block the writer. Set MH_C2C_CACHE=off to disable (shared with mh_c_2_c).
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+CACHE_ENABLED = os.getenv("MH_C2C_CACHE", "on").lower() != "off"
+CACHE_PATH = Path(os.getenv("MH_C2C_CACHE_DIR", ".mhc2c_cache")) / "answers.sqlite3"
+CACHE_VERSION = 1  # bump when a technique's prompts change → invalidates stored answers
+# (MH-C2C prompt changes bump mh_c_2_c.PROMPT_VERSION, which is part of every key too)
+
+# Model settings read by every technique; a change must miss the cache
+_SETTINGS = ("MH_C2C_MODEL", "MH_C2C_MODEL_CHEAP", "MH_C2C_MODEL_STRONG", "MH_C2C_TEMP")
+
+_lock = threading.Lock()
+_conn: Optional[sqlite3.Connection] = None
+
+
+def _connection() -> sqlite3.Connection:
+    global _conn
+    if _conn is None:
+        CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        _conn = sqlite3.connect(str(CACHE_PATH), check_same_thread=False)
+        _conn.execute("PRAGMA journal_mode=WAL")
+        _conn.execute("PRAGMA synchronous=NORMAL")
+        _conn.execute(
+            "CREATE TABLE IF NOT EXISTS answers ("
+            "key TEXT PRIMARY KEY, answer TEXT NOT NULL, api_calls INTEGER NOT NULL, elapsed REAL NOT NULL)"
+        )
+    return _conn
+
+
+def answer_key(technique: str, params: Dict[str, Any], question: str) -> str:
+    """sha256 of the technique name, its hyperparameters, model settings, prompt versions and the question."""
+    from mh_c_2_c import PROMPT_VERSION  # already loaded by the techniques being cached
+    settings = {name: os.getenv(name) for name in _SETTINGS}
+    payload = json.dumps([CACHE_VERSION, PROMPT_VERSION, technique, params, settings, question],
+                         sort_keys=True, default=repr)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def get(key: str) -> Optional[Tuple[str, int, float]]:
+    """Stored (answer, api_calls, elapsed seconds) for *key*, or None."""
+    with _lock:
+        return _connection().execute(
+            "SELECT answer, api_calls, elapsed FROM answers WHERE key = ?", (key,)
+        ).fetchone()
+
+
+def put(key: str, answer: str, api_calls: int, elapsed: float) -> None:
+    with _lock:
+        conn = _connection()
+        conn.execute("INSERT OR REPLACE INTO answers VALUES (?, ?, ?, ?)",
+                     (key, answer, api_calls, elapsed))
+        conn.commit()
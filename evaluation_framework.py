@@ -3,12 +3,28 @@ Evaluation Framework for MH-C2C vs. Other Prompting Techniques
 Compares MH-C2C against ToT, CoT, and Self-Consistency on various tasks.
 """
 
+import asyncio
+import contextlib
 import json
+import re
 import time
-from typing import List, Dict, Any
-from dataclasses import dataclass
+from typing import List, Dict, Any, Tuple, Optional, FrozenSet, Iterator, Union, NamedTuple, TYPE_CHECKING
+from dataclasses import dataclass, asdict
 from abc import ABC, abstractmethod
 
+import numpy as np
+
+import cache
+from scoring_numba import njit  # numba's, or a no-op when numba is missing
+
+if TYPE_CHECKING:  # mh_c_2_c needs an API key at import; only endpoint runs load it
+    from mh_c_2_c import EndpointConfig
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; stdlib json produces the same document
+    orjson = None
+
 # Test Questions across different domains
 TEST_QUESTIONS = [
     {
@@ -48,6 +64,18 @@ TEST_QUESTIONS = [
     }
 ]
 
+# Numeric EvaluationResult fields aggregated per technique, in column order
+SUMMARY_FIELDS = (
+    "accuracy_score", "coherence_score", "completeness_score", "creativity_score",
+    "execution_time", "api_calls", "cost_estimate"
+)
+
+# Composite-score weights for accuracy, coherence, completeness, creativity
+RANKING_WEIGHTS = np.array([0.3, 0.25, 0.25, 0.2])
+
+# Sentence boundaries used by the coherence and creativity metrics
+_SENT_RE = re.compile(r'[.!?]+')
+
 @dataclass
 class EvaluationResult:
     """Results from evaluating a single question with one technique."""
@@ -62,165 +90,557 @@ class EvaluationResult:
     creativity_score: float
     cost_estimate: float
 
+class ResultsColumns:
+    """Column-oriented (structure-of-arrays) store of evaluation results.
+    
+    String fields are parallel lists and the numeric SUMMARY_FIELDS share one
+    column-major float matrix, so per-field reductions read contiguous memory.
+    Indexing and iteration yield EvaluationResult rows for row-based callers.
+    """
+    
+    def __init__(self, capacity: int = 0):
+        self.technique: List[str] = [""] * capacity
+        self.question_id: List[str] = [""] * capacity
+        self.answer: List[str] = [""] * capacity
+        self.values = np.full((capacity, len(SUMMARY_FIELDS)), np.nan, order="F")
+        self.filled = np.zeros(capacity, dtype=bool)
+    
+    def column(self, field: str) -> np.ndarray:
+        """Writable view of one numeric field."""
+        return self.values[:, SUMMARY_FIELDS.index(field)]
+    
+    def write(self, index: int, result: EvaluationResult):
+        """Store *result* in row *index*."""
+        self.technique[index] = result.technique
+        self.question_id[index] = result.question_id
+        self.answer[index] = result.answer
+        self.values[index] = [getattr(result, field) for field in SUMMARY_FIELDS]
+        self.filled[index] = True
+    
+    def compact(self) -> "ResultsColumns":
+        """Copy of this store without the rows that were never written."""
+        keep = np.flatnonzero(self.filled).tolist()
+        columns = ResultsColumns()
+        columns.technique = [self.technique[i] for i in keep]
+        columns.question_id = [self.question_id[i] for i in keep]
+        columns.answer = [self.answer[i] for i in keep]
+        columns.values = np.asfortranarray(self.values[keep])
+        columns.filled = np.ones(len(keep), dtype=bool)
+        return columns
+    
+    def _row(self, index: int) -> EvaluationResult:
+        row = dict(zip(SUMMARY_FIELDS, self.values[index].tolist()))
+        row["api_calls"] = int(row["api_calls"])
+        return EvaluationResult(
+            technique=self.technique[index],
+            question_id=self.question_id[index],
+            answer=self.answer[index],
+            **row
+        )
+    
+    def __len__(self) -> int:
+        return len(self.technique)
+    
+    def __getitem__(self, index: Union[int, slice]) -> Union[EvaluationResult, List[EvaluationResult]]:
+        if isinstance(index, slice):
+            return [self._row(i) for i in range(len(self))[index]]
+        return self._row(range(len(self))[index])
+    
+    def __iter__(self) -> Iterator[EvaluationResult]:
+        return (self._row(i) for i in range(len(self)))
+
+class TechniqueTotals(NamedTuple):
+    """Results grouped by technique: SUMMARY_FIELDS sums and counts per technique."""
+    names: List[str]
+    sums: np.ndarray
+    counts: np.ndarray
+
 @dataclass 
 class ComparisonReport:
     """Complete comparison report across all techniques and questions."""
-    results: List[EvaluationResult]
+    results: ResultsColumns
     summary_stats: Dict[str, Any]
     technique_rankings: Dict[str, int]
 
 class PromptingTechnique(ABC):
     """Abstract base class for prompting techniques."""
     
+    __slots__ = ("name",)
+    
     def __init__(self, name: str):
         self.name = name
-        self.api_calls = 0
         
     @abstractmethod
-    def solve(self, question: str) -> str:
-        """Solve a question using this prompting technique."""
+    def solve(self, question: str) -> Tuple[str, int]:
+        """Solve a question using this prompting technique.
+        
+        Returns (answer, api_calls_made). Calls are counted per invocation
+        rather than on the instance, so one technique can serve concurrent
+        solves.
+        """
         pass
     
-    def reset_counters(self):
-        """Reset API call counters."""
-        self.api_calls = 0
+    def params(self) -> Dict[str, Any]:
+        """Hyperparameters that shape this technique's answers.
+        
+        Part of the answer-cache key; defaults to the attributes declared in
+        __slots__ by the technique's classes.
+        """
+        return {
+            slot: getattr(self, slot)
+            for cls in type(self).__mro__
+            for slot in getattr(cls, "__slots__", ())
+            if slot != "name"
+        }
+    
+    async def asolve(self, question: str, category: str | None = None) -> Tuple[str, int]:
+        """Async variant of solve; runs the blocking solve in a worker thread.
+
+        *category* is the question's task category, for techniques that keep
+        per-category memories; others ignore it.
+        """
+        return await asyncio.to_thread(self.solve, question)
+
+def _json_bytes(obj: Any) -> bytes:
+    """Serialize *obj* as 2-space indented JSON, via orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2)
+    return json.dumps(obj, indent=2).encode()
+
+def _json_line(obj: Any) -> bytes:
+    """Serialize *obj* as one compact JSON line, via orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj) + b"\n"
+    return json.dumps(obj).encode() + b"\n"
+
+def _read_checkpoint(path: str) -> Dict[Tuple[str, str], Dict[str, Any]]:
+    """Records of an evaluation checkpoint, keyed by (technique, question id).
+    
+    A missing file is an empty checkpoint; a line cut short by a crash is skipped.
+    """
+    records = {}
+    try:
+        with open(path, 'rb') as f:
+            for line in f:
+                try:
+                    record = orjson.loads(line) if orjson is not None else json.loads(line)
+                except ValueError:
+                    continue
+                records[(record["technique"], record["question_id"])] = record
+    except FileNotFoundError:
+        pass
+    return records
+
+@njit(cache=True)
+def _coherence_numeric(sentence_word_counts: np.ndarray, starts_upper: bool, ends_period: bool) -> float:
+    """Numeric part of coherence_score, given words per (non-empty) sentence."""
+    # Penalize very short or very long sentences
+    avg_length = sentence_word_counts.sum() / sentence_word_counts.shape[0]
+    coherence = min(1.0, max(0.1, 1.0 - abs(avg_length - 15) / 20))
+    
+    # Bonus for proper structure
+    if starts_upper and ends_period:
+        coherence += 0.1
+        
+    return min(1.0, coherence)
+
+@njit(cache=True)
+def _completeness_numeric(word_count: int) -> float:
+    """Piecewise completeness curve over the answer's word count."""
+    # Optimal range: 50-200 words
+    if 50 <= word_count <= 200:
+        return 1.0
+    elif word_count < 20:
+        return word_count / 20
+    elif word_count > 300:
+        return max(0.3, 1.0 - (word_count - 200) / 1000)
+    else:
+        return 0.8  # Reasonable length
 
 class EvaluationMetrics:
     """Scoring functions for different aspects of answers."""
     
     @staticmethod
-    def accuracy_score(answer: str, ground_truth: str) -> float:
-        """Score answer accuracy against ground truth (0-1)."""
-        if ground_truth is None:
+    def accuracy_score(answer: str, truth_tokens: Optional[FrozenSet[str]],
+                       answer_lower: Optional[str] = None) -> float:
+        """Score answer accuracy against precomputed ground-truth tokens (0-1)."""
+        if truth_tokens is None:
             return 0.5  # Neutral for subjective questions
         
         # Simple word overlap for now - could use semantic similarity
-        answer_words = set(answer.lower().split())
-        truth_words = set(ground_truth.lower().split())
+        if answer_lower is None:
+            answer_lower = answer.lower()
+        answer_tokens = frozenset(answer_lower.split())
         
-        if len(truth_words) == 0:
-            return 1.0 if len(answer_words) == 0 else 0.0
+        if len(truth_tokens) == 0:
+            return 1.0 if len(answer_tokens) == 0 else 0.0
             
-        intersection = len(answer_words.intersection(truth_words))
-        union = len(answer_words.union(truth_words))
+        intersection = len(answer_tokens & truth_tokens)
+        union = len(answer_tokens) + len(truth_tokens) - intersection
         return intersection / union if union > 0 else 0.0
     
     @staticmethod
-    def coherence_score(answer: str) -> float:
-        """Score logical coherence and readability (0-1)."""
+    def coherence_score(answer: str, sentences: Optional[List[str]] = None) -> float:
+        """Score logical coherence and readability (0-1).
+        
+        sentences is the _SENT_RE split of answer, if already computed.
+        """
         # Simple heuristics - could use more sophisticated models
-        sentences = [s.strip() for s in answer.split('.') if s.strip()]
+        if sentences is None:
+            sentences = _SENT_RE.split(answer)
+        sentences = [s.strip() for s in sentences if s.strip()]
         if len(sentences) == 0:
             return 0.0
             
-        # Penalize very short or very long sentences
-        avg_length = sum(len(s.split()) for s in sentences) / len(sentences)
-        coherence = min(1.0, max(0.1, 1.0 - abs(avg_length - 15) / 20))
-        
-        # Bonus for proper structure
-        if answer[0].isupper() and answer.endswith('.'):
-            coherence += 0.1
-            
-        return min(1.0, coherence)
+        word_counts = np.array([len(s.split()) for s in sentences], dtype=np.int32)
+        return float(_coherence_numeric(word_counts, answer[0].isupper(), answer.endswith('.')))
     
     @staticmethod 
     def completeness_score(answer: str) -> float:
         """Score how complete/comprehensive the answer is (0-1)."""
         # Based on length and structure
-        word_count = len(answer.split())
-        
-        # Optimal range: 50-200 words
-        if 50 <= word_count <= 200:
-            return 1.0
-        elif word_count < 20:
-            return word_count / 20
-        elif word_count > 300:
-            return max(0.3, 1.0 - (word_count - 200) / 1000)
-        else:
-            return 0.8  # Reasonable length
+        return float(_completeness_numeric(len(answer.split())))
     
-    @staticmethod
-    def creativity_score(answer: str) -> float:
+    # Words that suggest a creative/original answer
+    CREATIVE_INDICATORS = (
+        'imagine', 'creative', 'innovative', 'unique', 'novel',
+        'metaphor', 'analogy', 'perspective', 'unusual', 'interesting'
+    )
+    
+    @classmethod
+    def creativity_score(cls, answer: str, sentences: Optional[List[str]] = None,
+                         answer_lower: Optional[str] = None) -> float:
         """Score creativity/originality (0-1)."""
-        # Simple heuristics for creativity
-        creative_indicators = [
-            'imagine', 'creative', 'innovative', 'unique', 'novel',
-            'metaphor', 'analogy', 'perspective', 'unusual', 'interesting'
-        ]
+        return float(cls.creativity_score_batch(
+            [answer],
+            None if sentences is None else [sentences],
+            None if answer_lower is None else [answer_lower]
+        )[0])
+    
+    @classmethod
+    def creativity_score_batch(cls, answers: List[str],
+                               sentence_lists: Optional[List[List[str]]] = None,
+                               answers_lower: Optional[List[str]] = None) -> np.ndarray:
+        """Score creativity/originality (0-1) of many answers at once.
+        
+        sentence_lists and answers_lower may carry per-answer _SENT_RE splits
+        and lowercased text computed by the caller.
+        """
+        if answers_lower is None:
+            answers_lower = [answer.lower() for answer in answers]
+        if sentence_lists is None:
+            sentence_lists = [_SENT_RE.split(answer) for answer in answers]
         
-        answer_lower = answer.lower()
-        creative_count = sum(1 for word in creative_indicators if word in answer_lower)
+        # Simple heuristics for creativity: indicator hits per answer
+        hits = np.array(
+            [[word in answer_lower for word in cls.CREATIVE_INDICATORS]
+             for answer_lower in answers_lower],
+            dtype=bool
+        ).reshape(len(answers), len(cls.CREATIVE_INDICATORS))
+        creative_count = hits.sum(axis=1)
         
         # Bonus for varied sentence structures
-        sentences = answer.split('.')
-        varied_starts = len(set(s.strip()[:3].lower() for s in sentences if s.strip()))
-        variety_bonus = min(0.3, varied_starts / len(sentences)) if sentences else 0
+        varied_starts = np.array(
+            [len(set(s.strip()[:3].lower() for s in sentences if s.strip())) for sentences in sentence_lists],
+            dtype=np.float64
+        )
+        num_sentences = np.array([len(sentences) for sentences in sentence_lists], dtype=np.float64)
+        variety_bonus = np.minimum(0.3, varied_starts / num_sentences)
         
-        return min(1.0, creative_count * 0.1 + variety_bonus + 0.4)
+        return np.minimum(1.0, creative_count * 0.1 + variety_bonus + 0.4)
 
 class EvaluationFramework:
     """Main evaluation framework coordinator."""
     
-    def __init__(self):
+    def __init__(self, max_concurrency: int = 16, use_cache: bool = True,
+                 endpoints: Optional[List["EndpointConfig"]] = None):
         self.techniques: List[PromptingTechnique] = []
         self.metrics = EvaluationMetrics()
+        # Upper bound on in-flight solve() calls, to respect API rate limits
+        self.max_concurrency = max_concurrency
+        # With several endpoints, pairs are sharded across them instead
+        # (each endpoint applies its own concurrency_limit)
+        self.endpoints = endpoints or []
+        # Reuse answers stored by earlier runs (see cache.py); with use_cache=False
+        # the LLM response and MH-C2C run caches are bypassed as well
+        self.use_cache = use_cache and cache.CACHE_ENABLED
+        self.fresh = not use_cache
+        # Ground-truth token sets, tokenized once rather than per technique
+        self._gt_tokens = {
+            q["id"]: frozenset(q["ground_truth"].lower().split())
+            for q in TEST_QUESTIONS if q.get("ground_truth") is not None
+        }
         
     def add_technique(self, technique: PromptingTechnique):
         """Add a prompting technique to evaluate."""
         self.techniques.append(technique)
         
-    def evaluate_single(self, technique: PromptingTechnique, question: Dict) -> EvaluationResult:
-        """Evaluate one technique on one question."""
-        technique.reset_counters()
-        start_time = time.time()
+    async def aevaluate_single(self, technique: PromptingTechnique, question: Dict) -> EvaluationResult:
+        """Evaluate one technique on one question.
         
-        answer = technique.solve(question["question"])
+        The answer-text scores are left as NaN; they are filled in for all
+        answers at once by score_answers.
+        """
+        start_time = time.perf_counter()
         
-        execution_time = time.time() - start_time
+        answer, api_calls = await technique.asolve(question["question"],
+                                                   category=question.get("category"))
         
-        # Calculate scores
-        accuracy = self.metrics.accuracy_score(answer, question.get("ground_truth"))
-        coherence = self.metrics.coherence_score(answer) 
-        completeness = self.metrics.completeness_score(answer)
-        creativity = self.metrics.creativity_score(answer)
+        execution_time = time.perf_counter() - start_time
         
         # Estimate cost (rough: $0.002 per API call for GPT-4)
-        cost_estimate = technique.api_calls * 0.002
+        return self._unscored_result(technique, question, answer, execution_time,
+                                     api_calls, api_calls * 0.002)
+    
+    async def _evaluate_all(self, pairs: List[Tuple[PromptingTechnique, Dict]],
+                            batched_answers: Optional[Dict[Tuple[str, str], Tuple[str, int]]] = None,
+                            concurrency: Optional[int] = None,
+                            checkpoint: Optional[str] = None) -> ResultsColumns:
+        """Evaluate all (technique, question) pairs concurrently.
+        
+        Each pair writes into its own preallocated row; failed pairs leave
+        their row unfilled. Pairs found in batched_answers are recorded
+        without solving them again.
+        
+        With a checkpoint path, every finished pair is appended to that
+        JSON-lines file as it completes, and pairs already in it (from a run
+        that crashed or was interrupted) are restored instead of solved.
+        """
+        semaphore = asyncio.Semaphore(concurrency or self.max_concurrency)
+        results = ResultsColumns(len(pairs))
+        batched_answers = batched_answers or {}
+        done = _read_checkpoint(checkpoint) if checkpoint else {}
+        log = open(checkpoint, 'ab') if checkpoint else None
+        if log is not None and log.tell() > 0:
+            log.write(b"\n")  # terminate a line a crash may have cut short
+        
+        def record(index: int, result: EvaluationResult):
+            results.write(index, result)
+            if log is not None:
+                log.write(_json_line(asdict(result)))
+                log.flush()
+        
+        async def solve_bounded(technique: PromptingTechnique, question: Dict) -> EvaluationResult:
+            async with semaphore:
+                return await self.aevaluate_single(technique, question)
+        
+        async def bounded(index: int, technique: PromptingTechnique, question: Dict,
+                          solve=solve_bounded, requeue=None):
+            restored = done.get((technique.name, question["id"]))
+            if restored is not None:
+                results.write(index, self._unscored_result(
+                    technique, question, restored["answer"], restored["execution_time"],
+                    restored["api_calls"], restored["cost_estimate"]
+                ))
+                return
+            batched = batched_answers.get((technique.name, question["id"]))
+            if batched is not None:
+                record(index, self._batched_result(technique, question, *batched))
+                return
+            key = None
+            if self.use_cache:
+                key = cache.answer_key(technique.name, technique.params(), question["question"])
+                hit = await asyncio.to_thread(cache.get, key)
+                if hit is not None:
+                    answer, api_calls, elapsed = hit
+                    record(index, self._unscored_result(technique, question, answer, elapsed,
+                                                        api_calls, api_calls * 0.002))
+                    print(f"  = {technique.name} on {question['id']} reused from cache")
+                    return
+            try:
+                result = await solve(technique, question)
+            except Exception as e:
+                if requeue is not None and requeue(index, e):
+                    print(f"  ~ {technique.name} on {question['id']} requeued for another endpoint: {e}")
+                    return
+                print(f"  - {technique.name} on {question['id']} failed: {e}")
+                return
+            if key is not None:
+                await asyncio.to_thread(cache.put, key, result.answer, result.api_calls, result.execution_time)
+            record(index, result)
+            print(f"  + {technique.name} on {question['id']} completed in {result.execution_time:.1f}s")
+        
+        if done:
+            print(f"Restored {len(done)} results from checkpoint {checkpoint}")
+        bypass = contextlib.nullcontext()
+        if self.fresh:
+            from mh_c_2_c import no_cache
+            bypass = no_cache()
+        try:
+            with bypass:
+                if self.endpoints:
+                    await self._dispatch_to_endpoints(pairs, bounded)
+                else:
+                    await asyncio.gather(
+                        *(bounded(index, technique, question) for index, (technique, question) in enumerate(pairs))
+                    )
+        finally:
+            if log is not None:
+                log.close()
+        return results
+    
+    async def _dispatch_to_endpoints(self, pairs: List[Tuple[PromptingTechnique, Dict]], bounded) -> None:
+        """Shard pairs across self.endpoints through one shared queue.
+        
+        Each endpoint runs concurrency_limit workers with its own clients
+        and request limiter, so faster endpoints simply take more pairs. A
+        pair that fails with a rate limit, server or connection error is
+        handed to an endpoint it has not tried yet, until every endpoint
+        has failed it.
+        """
+        from mh_c_2_c import use_client
+        
+        queue: asyncio.Queue = asyncio.Queue()
+        for index, pair in enumerate(pairs):
+            queue.put_nowait((index, pair))
+        retries = [asyncio.Queue() for _ in self.endpoints]  # pairs routed to one endpoint
+        tried: List[set] = [set() for _ in pairs]  # endpoints each pair has failed on
+        outstanding = len(pairs)
+        wake = asyncio.Condition()
         
+        def requeue(index: int, error: Exception) -> bool:
+            nonlocal outstanding
+            status = getattr(error, "status_code", None)
+            transient = status == 429 or (status or 0) >= 500 or type(error).__name__ in (
+                "APIConnectionError", "APITimeoutError"
+            )
+            untried = [j for j in range(len(self.endpoints)) if j not in tried[index]]
+            if not transient or not untried:
+                return False
+            retries[untried[0]].put_nowait((index, pairs[index]))
+            outstanding += 1
+            return True
+        
+        async def worker(endpoint: int, solve):
+            nonlocal outstanding
+            inbox = retries[endpoint]
+            while True:
+                async with wake:
+                    # Idle workers wait for a retry routed to them until every pair is done
+                    await wake.wait_for(lambda: not outstanding or not inbox.empty() or not queue.empty())
+                    if not outstanding:
+                        return
+                    index, (technique, question) = (inbox if not inbox.empty() else queue).get_nowait()
+                tried[index].add(endpoint)
+                await bounded(index, technique, question, solve, requeue)
+                async with wake:
+                    outstanding -= 1
+                    wake.notify_all()
+        
+        workers = []
+        clients = []
+        for j, endpoint in enumerate(self.endpoints):
+            client, sync_client = endpoint.async_client(), endpoint.sync_client()
+            clients.append((client, sync_client))
+            sem = asyncio.Semaphore(endpoint.concurrency_limit)
+            
+            async def solve_on(technique, question, client=client, sem=sem, sync_client=sync_client):
+                with use_client(client, sem, sync_client):
+                    return await self.aevaluate_single(technique, question)
+            
+            workers += [worker(j, solve_on) for _ in range(endpoint.concurrency_limit)]
+        try:
+            await asyncio.gather(*workers)
+        finally:
+            for client, sync_client in clients:
+                await client.close()
+                sync_client.close()
+    
+    @staticmethod
+    def _unscored_result(technique: PromptingTechnique, question: Dict, answer: str,
+                         execution_time: float, api_calls: int, cost_estimate: float) -> EvaluationResult:
+        """Result row whose answer-text scores are left for score_answers.
+        
+        Cached answers keep the solve time and API calls of the run that
+        produced them, so reports stay comparable across runs.
+        """
+        nan = float("nan")
         return EvaluationResult(
             technique=technique.name,
             question_id=question["id"],
             answer=answer,
             execution_time=execution_time,
-            api_calls=technique.api_calls,
-            accuracy_score=accuracy,
-            coherence_score=coherence,
-            completeness_score=completeness,
-            creativity_score=creativity,
+            api_calls=api_calls,
+            accuracy_score=nan,
+            coherence_score=nan,
+            completeness_score=nan,
+            creativity_score=nan,
             cost_estimate=cost_estimate
         )
     
-    def run_comparison(self) -> ComparisonReport:
-        """Run complete evaluation across all techniques and questions."""
-        results = []
+    @classmethod
+    def _batched_result(cls, technique: PromptingTechnique, question: Dict, answer: str, api_calls: int) -> EvaluationResult:
+        """Result row for an answer obtained through the Batch API.
+        
+        Batched requests have no per-request latency to measure, so
+        execution_time is 0; they are billed at half the synchronous rate.
+        """
+        return cls._unscored_result(technique, question, answer, 0.0, api_calls, api_calls * 0.002 * 0.5)
+    
+    def score_answers(self, results: ResultsColumns):
+        """Fill in the answer-text scores for all results.
         
+        Each answer is lowercased and split into sentences once, and the
+        same pieces are shared by every metric.
+        """
+        answers = results.answer
+        answers_lower = [answer.lower() for answer in answers]
+        sentence_lists = [_SENT_RE.split(answer) for answer in answers]
+        
+        results.column("accuracy_score")[:] = [
+            self.metrics.accuracy_score(answer, self._gt_tokens.get(question_id), answer_lower)
+            for answer, question_id, answer_lower in zip(answers, results.question_id, answers_lower)
+        ]
+        results.column("coherence_score")[:] = [
+            self.metrics.coherence_score(answer, sentences)
+            for answer, sentences in zip(answers, sentence_lists)
+        ]
+        results.column("completeness_score")[:] = [
+            self.metrics.completeness_score(answer) for answer in answers
+        ]
+        results.column("creativity_score")[:] = self.metrics.creativity_score_batch(
+            answers, sentence_lists, answers_lower
+        )
+    
+    def run_comparison(self, batched_answers: Optional[Dict[Tuple[str, str], Tuple[str, int]]] = None,
+                       concurrency: Optional[int] = None,
+                       checkpoint: Optional[str] = None) -> ComparisonReport:
+        """Run complete evaluation across all techniques and questions.
+        
+        Synchronous wrapper around run_comparison_async, for callers
+        without an event loop.
+        """
+        return asyncio.run(self.run_comparison_async(batched_answers, concurrency, checkpoint))
+    
+    async def run_comparison_async(self, batched_answers: Optional[Dict[Tuple[str, str], Tuple[str, int]]] = None,
+                                   concurrency: Optional[int] = None,
+                                   checkpoint: Optional[str] = None) -> ComparisonReport:
+        """Run complete evaluation across all techniques and questions.
+        
+        Every (technique, question) pair is its own task, with at most
+        concurrency (default max_concurrency) solving at once.
+        batched_answers maps (technique name, question id) to (answer,
+        api_calls) for pairs already answered, e.g. by
+        prompting_techniques.batch_solve. checkpoint names a JSON-lines
+        file that records finished pairs and resumes from them.
+        """
+        concurrency = concurrency or self.max_concurrency
         print("Starting comprehensive evaluation...")
+        if self.endpoints:
+            limits = ", ".join(f"{endpoint.name}: {endpoint.concurrency_limit}" for endpoint in self.endpoints)
+        else:
+            limits = f"max {concurrency}"
+        print(f"Dispatching {len(TEST_QUESTIONS) * len(self.techniques)} evaluations "
+              f"({limits} concurrent)")
         
-        for question in TEST_QUESTIONS:
-            print(f"\nEvaluating: {question['id']} - {question['category']}")
-            
-            for technique in self.techniques:
-                print(f"  Running {technique.name}...")
-                try:
-                    result = self.evaluate_single(technique, question)
-                    results.append(result)
-                    print(f"    + Completed in {result.execution_time:.1f}s")
-                except Exception as e:
-                    print(f"    - Failed: {e}")
+        pairs = [(technique, question) for question in TEST_QUESTIONS for technique in self.techniques]
+        results = (await self._evaluate_all(pairs, batched_answers, concurrency, checkpoint)).compact()
+        self.score_answers(results)
         
         # Generate summary statistics
-        summary_stats = self._generate_summary(results)
-        technique_rankings = self._rank_techniques(results)
+        grouped = self._technique_totals(results)
+        summary_stats = self._generate_summary(grouped)
+        technique_rankings = self._rank_techniques(grouped)
         
         return ComparisonReport(
             results=results,
@@ -228,75 +648,72 @@ class EvaluationFramework:
             technique_rankings=technique_rankings
         )
     
-    def _generate_summary(self, results: List[EvaluationResult]) -> Dict[str, Any]:
-        """Generate summary statistics from results."""
-        summary = {}
+    @staticmethod
+    def _technique_totals(results: ResultsColumns) -> TechniqueTotals:
+        """Group results by technique in a single pass over the columns."""
+        if not results:
+            return TechniqueTotals([], np.zeros((0, len(SUMMARY_FIELDS))), np.zeros(0, dtype=np.intp))
         
-        for technique_name in set(r.technique for r in results):
-            technique_results = [r for r in results if r.technique == technique_name]
-            
+        names, inverse = np.unique(results.technique, return_inverse=True)
+        counts = np.bincount(inverse, minlength=len(names))
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        sums = np.add.reduceat(results.values[np.argsort(inverse, kind="stable")], starts, axis=0)
+        return TechniqueTotals(names.tolist(), sums, counts)
+    
+    def _generate_summary(self, grouped: TechniqueTotals) -> Dict[str, Any]:
+        """Generate summary statistics from grouped results."""
+        names, sums, counts = grouped
+        means = sums / counts[:, None]
+        
+        summary = {}
+        for k, technique_name in enumerate(names):
             summary[technique_name] = {
-                "avg_accuracy": sum(r.accuracy_score for r in technique_results) / len(technique_results),
-                "avg_coherence": sum(r.coherence_score for r in technique_results) / len(technique_results),
-                "avg_completeness": sum(r.completeness_score for r in technique_results) / len(technique_results),
-                "avg_creativity": sum(r.creativity_score for r in technique_results) / len(technique_results),
-                "avg_time": sum(r.execution_time for r in technique_results) / len(technique_results),
-                "total_api_calls": sum(r.api_calls for r in technique_results),
-                "total_cost": sum(r.cost_estimate for r in technique_results),
-                "questions_completed": len(technique_results)
+                "avg_accuracy": float(means[k, 0]),
+                "avg_coherence": float(means[k, 1]),
+                "avg_completeness": float(means[k, 2]),
+                "avg_creativity": float(means[k, 3]),
+                "avg_time": float(means[k, 4]),
+                "total_api_calls": int(sums[k, 5]),
+                "total_cost": float(sums[k, 6]),
+                "questions_completed": int(counts[k])
             }
         
         return summary
     
-    def _rank_techniques(self, results: List[EvaluationResult]) -> Dict[str, int]:
+    def _rank_techniques(self, grouped: TechniqueTotals) -> Dict[str, int]:
         """Rank techniques by overall performance."""
-        technique_scores = {}
+        names, sums, counts = grouped
         
-        for technique_name in set(r.technique for r in results):
-            technique_results = [r for r in results if r.technique == technique_name]
-            
-            # Composite score: weighted average of all metrics
-            composite_score = sum(
-                0.3 * r.accuracy_score +
-                0.25 * r.coherence_score + 
-                0.25 * r.completeness_score +
-                0.2 * r.creativity_score
-                for r in technique_results
-            ) / len(technique_results)
-            
-            technique_scores[technique_name] = composite_score
+        # Composite score: weighted average of all metrics
+        composite_scores = (sums[:, :4] / counts[:, None]) @ RANKING_WEIGHTS
         
         # Rank by composite score
-        sorted_techniques = sorted(technique_scores.items(), key=lambda x: x[1], reverse=True)
-        return {name: rank + 1 for rank, (name, score) in enumerate(sorted_techniques)}
+        order = np.argsort(-composite_scores, kind="stable")
+        return {names[k]: rank + 1 for rank, k in enumerate(order.tolist())}
     
     def save_results(self, report: ComparisonReport, filename: str):
-        """Save evaluation results to JSON file."""
-        # Convert to serializable format
-        serializable_results = []
-        for result in report.results:
-            serializable_results.append({
-                "technique": result.technique,
-                "question_id": result.question_id,
-                "answer": result.answer,
-                "execution_time": result.execution_time,
-                "api_calls": result.api_calls,
-                "accuracy_score": result.accuracy_score,
-                "coherence_score": result.coherence_score,
-                "completeness_score": result.completeness_score,
-                "creativity_score": result.creativity_score,
-                "cost_estimate": result.cost_estimate
-            })
-        
-        report_data = {
-            "results": serializable_results,
-            "summary_stats": report.summary_stats,
-            "technique_rankings": report.technique_rankings,
-            "test_questions": TEST_QUESTIONS
-        }
+        """Save evaluation results to JSON file.
         
-        with open(filename, 'w') as f:
-            json.dump(report_data, f, indent=2)
+        Results are streamed to disk one record at a time rather than first
+        building a serializable copy of the whole report.
+        """
+        sections = (
+            ("summary_stats", report.summary_stats),
+            ("technique_rankings", report.technique_rankings),
+            ("test_questions", TEST_QUESTIONS)
+        )
+        
+        with open(filename, 'wb') as f:
+            f.write(b'{\n  "results": [')
+            for index, result in enumerate(report.results):
+                f.write(b',\n    ' if index else b'\n    ')
+                f.write(_json_bytes(asdict(result)).replace(b'\n', b'\n    '))
+            f.write(b'\n  ]' if len(report.results) else b']')
+            
+            for key, value in sections:
+                f.write(b',\n  ' + _json_bytes(key) + b': ')
+                f.write(_json_bytes(value).replace(b'\n', b'\n  '))
+            f.write(b'\n}\n')
         
         print(f"Results saved to {filename}")
 
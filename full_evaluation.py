@@ -61,6 +61,9 @@ def print_comprehensive_analysis(report, questions):
     print("COMPREHENSIVE ANALYSIS")
     print("=" * 70)
     
+    # Index questions once so per-result lookups are O(1)
+    q_by_id = {q["id"]: q for q in questions}
+    
     # Overall rankings
     print("\n🏆 OVERALL TECHNIQUE RANKINGS:")
     for technique, rank in sorted(report.technique_rankings.items(), key=lambda x: x[1]):
@@ -79,20 +82,19 @@ def print_comprehensive_analysis(report, questions):
         print(f"  💰 Est. Cost:    ${stats['total_cost']:.3f}")
     
     # Category-specific analysis
-    analyze_by_category(report, questions)
+    analyze_by_category(report, q_by_id)
     
     # MH-C2C specific insights
-    analyze_mhc2c_performance(report, questions)
+    analyze_mhc2c_performance(report, q_by_id)
 
-def analyze_by_category(report, questions):
+def analyze_by_category(report, q_by_id):
     """Analyze performance by question category."""
     print("\n📋 PERFORMANCE BY QUESTION CATEGORY:")
     
     # Group results by category
     category_results = {}
     for result in report.results:
-        question = next(q for q in questions if q["id"] == result.question_id)
-        category = question["category"]
+        category = q_by_id[result.question_id]["category"]
         
         if category not in category_results:
             category_results[category] = {}
@@ -118,7 +120,7 @@ def analyze_by_category(report, questions):
         for i, (technique, score) in enumerate(ranked, 1):
             print(f"    {i}. {technique}: {score:.3f}")
 
-def analyze_mhc2c_performance(report, questions):
+def analyze_mhc2c_performance(report, q_by_id):
     """Analyze where MH-C2C performs best and worst."""
     print("\n🤖 MH-C2C DETAILED ANALYSIS:")
     
@@ -139,14 +141,14 @@ def analyze_mhc2c_performance(report, questions):
     
     print(f"\n  🎯 Best Performance:")
     for question_id, score, result in mhc2c_scores[:3]:
-        question = next(q for q in questions if q["id"] == question_id)
+        question = q_by_id[question_id]
         print(f"    {question_id} ({question['category']}): {score:.3f}")
         print(f"      Accuracy: {result.accuracy_score:.3f}, "
               f"Coherence: {result.coherence_score:.3f}")
     
     print(f"\n  📉 Worst Performance:")
     for question_id, score, result in mhc2c_scores[-3:]:
-        question = next(q for q in questions if q["id"] == question_id)
+        question = q_by_id[question_id]
         print(f"    {question_id} ({question['category']}): {score:.3f}")
         print(f"      Accuracy: {result.accuracy_score:.3f}, "
               f"Coherence: {result.coherence_score:.3f}")
@@ -2,7 +2,7 @@
 MH‑C2C  —  Metropolis‑Hastings Critique‑to‑Consensus
 Single‑file reference implementation ready to run with the OpenAI Python SDK.
 
-Install‑time deps  ▸  pip install openai tiktoken tenacity python-dotenv
+Install‑time deps  ▸  pip install openai tiktoken tenacity python-dotenv numpy
 Make a .env file with  OPENAI_API_KEY="sk‑..."
 
 Usage from the shell:
@@ -16,16 +16,27 @@ without external ground‑truth data.  Replace `score()` with your own metric
 from __future__ import annotations
 
 import argparse
-import math
+import asyncio
+import contextlib
+import contextvars
+import functools
+import hashlib
 import os
-import random
+import re
+import shelve
 import sys
+import threading
+import time
+import weakref
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import List
+from typing import Callable, Iterator, List, NamedTuple, Tuple
 
+import numpy as np
 from dotenv import load_dotenv
-from tenacity import retry, wait_exponential, stop_after_attempt
+from tenacity import (AsyncRetrying, RetryCallState, retry, retry_if_exception_type,
+                      stop_after_attempt, stop_after_delay, wait_random_exponential)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 1. API client setup
@@ -42,30 +53,424 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 if not OPENAI_API_KEY:  # pragma: no cover
     sys.exit("[!] OPENAI_API_KEY not found in environment or .env file")
 
-openai.api_key = OPENAI_API_KEY
+import httpx  # installed with openai
+
+try:  # HTTP/2 multiplexes concurrent requests over one connection; needs httpx[http2]
+    import h2  # noqa: F401
+    HTTP2 = True
+except ImportError:  # pragma: no cover
+    HTTP2 = False
+
+# Pooled keep‑alive connections, shared by every request of a client
+HTTP_LIMITS = httpx.Limits(max_connections=64, max_keepalive_connections=32)
+# The SDK's own retries are off in every client: _RETRY_POLICY is the only retry layer
+SDK_RETRIES = 0
+
+CLIENT = openai.OpenAI(api_key=OPENAI_API_KEY, max_retries=SDK_RETRIES,
+                       http_client=openai.DefaultHttpxClient(http2=HTTP2, limits=HTTP_LIMITS))
 MODEL_NAME: str = os.getenv("MH_C2C_MODEL", "gpt-4o-mini")
+# Low‑stakes calls (critiques, ratings) vs. calls that write answers
+CHEAP_MODEL: str = os.getenv("MH_C2C_MODEL_CHEAP", "gpt-4o-mini")
+STRONG_MODEL: str = os.getenv("MH_C2C_MODEL_STRONG", MODEL_NAME)
+EMBEDDING_MODEL: str = os.getenv("MH_C2C_MODEL_EMBED", "text-embedding-3-small")
 TEMPERATURE: float = float(os.getenv("MH_C2C_TEMP", "0.7"))
+MAX_INFLIGHT: int = int(os.getenv("MH_C2C_MAX_INFLIGHT", "10"))  # concurrent async requests
+CONTEXT_WINDOW: int = int(os.getenv("MH_C2C_CONTEXT_WINDOW", "128000"))  # prompt + output tokens
+
+# On‑disk cache of finished runs and LLM responses (set MH_C2C_CACHE=off to disable)
+CACHE_ENABLED: bool = os.getenv("MH_C2C_CACHE", "on").lower() != "off"
+CACHE_DIR = Path(os.getenv("MH_C2C_CACHE_DIR", ".mhc2c_cache"))
+CACHE_TTL_HOURS: float = float(os.getenv("MH_C2C_CACHE_TTL_HOURS", "24"))  # sampled responses
+RESPONSE_LRU_SIZE = 4096  # in‑memory responses kept when TEMPERATURE == 0
+MEMORIES_DIR = Path(os.getenv("MH_C2C_MEMORIES_DIR", "memories"))  # learned critique rubrics
+PROMPT_VERSION = 4  # bump whenever a prompt template changes → invalidates cached runs
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 2. LLM wrapper
 # ──────────────────────────────────────────────────────────────────────────────
 
-@retry(wait=wait_exponential(multiplier=1, min=1, max=20),
-       stop=stop_after_attempt(6))
-def call_llm(prompt: str, system_msg: str | None = None) -> str:
-    """Send *prompt* to the chat model and return the raw assistant text."""
+_CACHE_LOCK = threading.Lock()
+
+
+def _cache_key(task: str, **params) -> str:
+    """Stable digest of a task plus every setting that influences the result."""
+    return hashlib.blake2b((task + repr(sorted(params.items()))).encode()).hexdigest()
+
+
+def _cache_get(name: str, key: str):
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with _CACHE_LOCK, shelve.open(str(CACHE_DIR / name)) as db:
+        return db.get(key)
+
+
+def _cache_put(name: str, key: str, value) -> None:
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    with _CACHE_LOCK, shelve.open(str(CACHE_DIR / name)) as db:
+        db[key] = value
+
+
+# Responses at TEMPERATURE == 0 are deterministic and memoised in process; sampled
+# responses go to the on‑disk cache and expire after CACHE_TTL_HOURS.
+_RESPONSE_LRU: OrderedDict[str, str] = OrderedDict()
+_LRU_LOCK = threading.Lock()
+# Sampled responses are only replayed within the same scope, e.g. the same
+# MH‑C2C seed, so independent runs draw independent samples
+_CACHE_SCOPE: contextvars.ContextVar[str] = contextvars.ContextVar("mh_c2c_cache_scope", default="")
+# False inside runs that must not reuse cached responses
+_CACHE_ON: contextvars.ContextVar[bool] = contextvars.ContextVar("mh_c2c_cache_on", default=True)
+
+
+def _response_caching() -> bool:
+    return CACHE_ENABLED and _CACHE_ON.get()
+
+
+@contextlib.contextmanager
+def no_cache() -> Iterator[None]:
+    """Neither read nor store cached responses or MH‑C2C runs in this context
+    (and the tasks and worker threads it spawns)."""
+    token = _CACHE_ON.set(False)
+    try:
+        yield
+    finally:
+        _CACHE_ON.reset(token)
+
+
+class CallCount:
+    """API requests actually sent (cache hits and retries of one request excluded)."""
+
+    __slots__ = ("n", "_lock")
+
+    def __init__(self) -> None:
+        self.n = 0
+        self._lock = threading.Lock()  # sync calls run in worker threads
+
+    def add(self) -> None:
+        with self._lock:
+            self.n += 1
+
+
+_CALL_COUNT: contextvars.ContextVar[CallCount | None] = contextvars.ContextVar("mh_c2c_call_count",
+                                                                                default=None)
+
+
+@contextlib.contextmanager
+def count_calls() -> Iterator[CallCount]:
+    """Count the API requests issued in this context (and the tasks and worker
+    threads it spawns); read ``.n`` once the block is done."""
+    counter = CallCount()
+    token = _CALL_COUNT.set(counter)
+    try:
+        yield counter
+    finally:
+        _CALL_COUNT.reset(token)
+
+
+def _count_call() -> None:
+    counter = _CALL_COUNT.get()
+    if counter is not None:
+        counter.add()
+
+
+def _response_key(prompt: str,
+                  system_msg: str | None,
+                  sample: int,
+                  max_tokens: int,
+                  stop: List[str] | None,
+                  model: str) -> str:
+    scope = _CACHE_SCOPE.get() if TEMPERATURE != 0 else ""
+    return hashlib.sha256(
+        f"{model}|{TEMPERATURE}|{scope}|{max_tokens}|{stop}|{sample}|{system_msg}|{prompt}".encode()
+    ).hexdigest()
+
+
+def _lookup_response(key: str) -> str | None:
+    if TEMPERATURE == 0:
+        with _LRU_LOCK:
+            text = _RESPONSE_LRU.get(key)
+            if text is not None:
+                _RESPONSE_LRU.move_to_end(key)
+            return text
+    hit = _cache_get("responses", key)
+    if hit is not None and time.time() - hit[0] < CACHE_TTL_HOURS * 3600:
+        return hit[1]
+    return None
+
+
+def _store_response(key: str, text: str) -> None:
+    if TEMPERATURE == 0:
+        with _LRU_LOCK:
+            _RESPONSE_LRU[key] = text
+            _RESPONSE_LRU.move_to_end(key)
+            if len(_RESPONSE_LRU) > RESPONSE_LRU_SIZE:
+                _RESPONSE_LRU.popitem(last=False)
+    else:
+        _cache_put("responses", key, (time.time(), text))
+
+
+def chat_request(prompt: str,
+                 system_msg: str | None = None,
+                 max_tokens: int = 1024,
+                 stop: List[str] | None = None,
+                 model: str | None = None) -> dict:
+    """Chat‑completions request body for *prompt* (*model* defaults to MODEL_NAME)."""
     messages = []
     if system_msg:
         messages.append({"role": "system", "content": system_msg})
     messages.append({"role": "user", "content": prompt})
+    body = {"model": model or MODEL_NAME, "messages": messages,
+            "temperature": TEMPERATURE, "max_tokens": max_tokens}
+    if stop:
+        body["stop"] = stop
+    return body
 
-    response = openai.ChatCompletion.create(
-        model=MODEL_NAME,
-        messages=messages,
-        temperature=TEMPERATURE,
-        max_tokens=1024,
-    )
-    return response.choices[0].message["content"].strip()
+
+def call_llm(prompt: str,
+             system_msg: str | None = None,
+             sample: int = 0,
+             max_tokens: int = 1024,
+             stop: List[str] | None = None,
+             stream: bool = False,
+             stop_predicate: Callable[[str], bool] | None = None,
+             model: str | None = None) -> str:
+    """Send *prompt* to the chat model and return the raw assistant text.
+
+    Identical requests are answered from the response cache.  Callers that
+    want several independent samples of one prompt pass distinct *sample*
+    indices, which are part of the cache key.
+
+    With *stream* (implied by *stop_predicate*) the reply is streamed and
+    generation is abandoned as soon as ``stop_predicate(text_so_far)`` is
+    true; the text received so far is returned.
+    """
+    model = model or MODEL_NAME
+    key = _response_key(prompt, system_msg, sample, max_tokens, stop, model) if _response_caching() else None
+    if key is not None:
+        text = _lookup_response(key)
+        if text is not None:
+            return text
+    _count_call()
+    text, finished = _call_llm_uncached(chat_request(prompt, system_msg, max_tokens, stop, model),
+                                        stream, stop_predicate)
+    if key is not None and finished:
+        _store_response(key, text)
+    return text
+
+
+def _finished(finish_reason: str | None) -> bool:
+    return finish_reason not in ("length", None)
+
+
+# Transient failures worth retrying; anything else (bad request, auth) fails at once
+_RETRYABLE = (openai.RateLimitError, openai.APIConnectionError, openai.InternalServerError)
+RETRY_MAX_WAIT = 30.0     # seconds per backoff
+RETRY_BUDGET = 120.0      # seconds across all attempts of one request
+# Full jitter: agents rate‑limited by the same gather() back off by different amounts
+_backoff = wait_random_exponential(multiplier=0.5, max=RETRY_MAX_WAIT)
+
+
+def _retry_wait(retry_state: RetryCallState) -> float:
+    """Wait as long as the server's Retry‑After asks, else a jittered backoff."""
+    response = getattr(retry_state.outcome.exception(), "response", None)
+    if response is not None:
+        try:
+            return min(float(response.headers.get("retry-after")), RETRY_MAX_WAIT)
+        except (TypeError, ValueError):  # absent, or an HTTP date
+            pass
+    return _backoff(retry_state)
+
+
+_RETRY_POLICY = dict(wait=_retry_wait,
+                    stop=stop_after_attempt(6) | stop_after_delay(RETRY_BUDGET),
+                    retry=retry_if_exception_type(_RETRYABLE),
+                    reraise=True)
+
+
+@retry(**_RETRY_POLICY)
+def _call_llm_uncached(request: dict,
+                       stream: bool,
+                       stop_predicate: Callable[[str], bool] | None) -> Tuple[str, bool]:
+    """Returns (text, finished), finished being False for replies cut short."""
+    if not stream and stop_predicate is None:
+        choice = (_SHARED_SYNC_CLIENT.get() or CLIENT).chat.completions.create(**request).choices[0]
+        return choice.message.content.strip(), _finished(choice.finish_reason)
+
+    parts: List[str] = []
+    finish_reason = None
+    response = (_SHARED_SYNC_CLIENT.get() or CLIENT).chat.completions.create(**request, stream=True)
+    try:
+        for chunk in response:
+            if not chunk.choices:
+                continue
+            parts.append(chunk.choices[0].delta.content or "")
+            finish_reason = chunk.choices[0].finish_reason or finish_reason
+            if stop_predicate is not None and stop_predicate("".join(parts)):
+                finish_reason = None
+                break
+    finally:
+        response.close()
+    return "".join(parts).strip(), _finished(finish_reason)
+
+
+def new_async_client() -> openai.AsyncOpenAI:
+    """AsyncOpenAI client on a pooled (HTTP/2 when available) connection pool."""
+    http_client = openai.DefaultAsyncHttpxClient(http2=HTTP2, limits=HTTP_LIMITS)
+    return openai.AsyncOpenAI(api_key=OPENAI_API_KEY, max_retries=SDK_RETRIES, http_client=http_client)
+
+
+# An AsyncOpenAI client's connection pool and an asyncio.Semaphore both belong
+# to the event loop they are first used on, and every sync mh_c2c() call runs
+# its own loop, so they are created once per loop rather than at import time.
+_LOOP_CLIENTS: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop,
+                                         openai.AsyncOpenAI] = weakref.WeakKeyDictionary()
+_LOOP_SEMAPHORES: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop,
+                                            asyncio.Semaphore] = weakref.WeakKeyDictionary()
+# Clients (and limiter) installed by use_client() for the current context, if any
+_SHARED_CLIENT: contextvars.ContextVar[Tuple[openai.AsyncOpenAI, asyncio.Semaphore | None] | None] = \
+    contextvars.ContextVar("mh_c2c_client", default=None)
+_SHARED_SYNC_CLIENT: contextvars.ContextVar[openai.OpenAI | None] = \
+    contextvars.ContextVar("mh_c2c_sync_client", default=None)
+
+
+@contextlib.contextmanager
+def use_client(client: openai.AsyncOpenAI,
+               sem: asyncio.Semaphore | None = None,
+               sync_client: openai.OpenAI | None = None) -> Iterator[openai.AsyncOpenAI]:
+    """Send every async LLM call made in this context (and the tasks and
+    worker threads it spawns) through *client*, e.g. one opened for a whole
+    evaluation run.
+
+    *sem* replaces the per‑loop MAX_INFLIGHT limiter and *sync_client* the
+    module CLIENT for :func:`call_llm`, e.g. for one of several endpoints.
+    """
+    token = _SHARED_CLIENT.set((client, sem))
+    sync_token = _SHARED_SYNC_CLIENT.set(sync_client) if sync_client is not None else None
+    try:
+        yield client
+    finally:
+        if sync_token is not None:
+            _SHARED_SYNC_CLIENT.reset(sync_token)
+        _SHARED_CLIENT.reset(token)
+
+
+@dataclass
+class EndpointConfig:
+    """One OpenAI‑compatible endpoint (e.g. a vLLM node or a separately
+    rate‑limited API key) that evaluation work can be sharded across."""
+    name: str
+    base_url: str | None = None      # None → api.openai.com
+    api_key: str | None = None       # None → OPENAI_API_KEY
+    concurrency_limit: int = MAX_INFLIGHT
+
+    def async_client(self) -> openai.AsyncOpenAI:
+        http_client = openai.DefaultAsyncHttpxClient(http2=HTTP2, limits=HTTP_LIMITS)
+        return openai.AsyncOpenAI(api_key=self.api_key or OPENAI_API_KEY,
+                                  base_url=self.base_url, max_retries=SDK_RETRIES,
+                                  http_client=http_client)
+
+    def sync_client(self) -> openai.OpenAI:
+        http_client = openai.DefaultHttpxClient(http2=HTTP2, limits=HTTP_LIMITS)
+        return openai.OpenAI(api_key=self.api_key or OPENAI_API_KEY,
+                             base_url=self.base_url, max_retries=SDK_RETRIES,
+                             http_client=http_client)
+
+
+def _async_resources() -> Tuple[openai.AsyncOpenAI, asyncio.Semaphore]:
+    """Async client and in‑flight limiter for the running event loop."""
+    loop = asyncio.get_running_loop()
+    sem = _LOOP_SEMAPHORES.get(loop)
+    if sem is None:
+        sem = _LOOP_SEMAPHORES[loop] = asyncio.Semaphore(MAX_INFLIGHT)
+    shared = _SHARED_CLIENT.get()
+    if shared is not None:
+        return shared[0], shared[1] or sem
+    client = _LOOP_CLIENTS.get(loop)
+    if client is None:
+        client = _LOOP_CLIENTS[loop] = new_async_client()
+    return client, sem
+
+
+async def acall_llm(prompt: str,
+                    system_msg: str | None = None,
+                    client: openai.AsyncOpenAI | None = None,
+                    sem: asyncio.Semaphore | None = None,
+                    sample: int = 0,
+                    max_tokens: int = 1024,
+                    allow_truncated: bool = True,
+                    stop: List[str] | None = None,
+                    stream: bool = False,
+                    stop_predicate: Callable[[str], bool] | None = None,
+                    model: str | None = None) -> str | None:
+    """Async :func:`call_llm`; at most *sem* (default MAX_INFLIGHT) requests in flight.
+
+    With ``allow_truncated=False`` a reply cut short, by *max_tokens* or by
+    *stop_predicate*, is discarded and None is returned instead.  Replies
+    cut short are never cached.
+    """
+    model = model or MODEL_NAME
+    key = _response_key(prompt, system_msg, sample, max_tokens, stop, model) if _response_caching() else None
+    if key is not None:
+        text = await asyncio.to_thread(_lookup_response, key)
+        if text is not None:
+            return text
+    text, finished = await _acall_llm_uncached(chat_request(prompt, system_msg, max_tokens, stop, model),
+                                               client, sem, stream, stop_predicate)
+    if not finished and not allow_truncated:
+        return None
+    if key is not None and finished:
+        await asyncio.to_thread(_store_response, key, text)
+    return text
+
+
+async def _acall_llm_uncached(request: dict,
+                              client: openai.AsyncOpenAI | None,
+                              sem: asyncio.Semaphore | None,
+                              stream: bool,
+                              stop_predicate: Callable[[str], bool] | None) -> Tuple[str, bool]:
+    """Returns (text, finished), finished being False for replies cut short."""
+    if client is None or sem is None:
+        default_client, default_sem = _async_resources()
+        client, sem = client or default_client, sem or default_sem
+    async for attempt in AsyncRetrying(**_RETRY_POLICY):
+        with attempt:
+            async with sem:
+                if attempt.retry_state.attempt_number == 1:  # sent now, not while queued
+                    _count_call()
+                if not stream and stop_predicate is None:
+                    choice = (await client.chat.completions.create(**request)).choices[0]
+                    return choice.message.content.strip(), _finished(choice.finish_reason)
+
+                parts: List[str] = []
+                finish_reason = None
+                response = await client.chat.completions.create(**request, stream=True)
+                try:
+                    async for chunk in response:
+                        if not chunk.choices:
+                            continue
+                        parts.append(chunk.choices[0].delta.content or "")
+                        finish_reason = chunk.choices[0].finish_reason or finish_reason
+                        if stop_predicate is not None and stop_predicate("".join(parts)):
+                            finish_reason = None
+                            break
+                finally:
+                    await response.close()
+                return "".join(parts).strip(), _finished(finish_reason)
+
+
+async def aembed(texts: List[str],
+                 client: openai.AsyncOpenAI | None = None,
+                 sem: asyncio.Semaphore | None = None) -> np.ndarray:
+    """Unit‑norm embeddings of *texts* (one row each) from a single batched request."""
+    if client is None or sem is None:
+        default_client, default_sem = _async_resources()
+        client, sem = client or default_client, sem or default_sem
+    async for attempt in AsyncRetrying(**_RETRY_POLICY):
+        with attempt:
+            async with sem:
+                if attempt.retry_state.attempt_number == 1:
+                    _count_call()
+                resp = await client.embeddings.create(model=EMBEDDING_MODEL, input=texts)
+    vecs = np.array([d.embedding for d in sorted(resp.data, key=lambda d: d.index)])
+    return vecs / np.linalg.norm(vecs, axis=1, keepdims=True)
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 3. Scoring function (replace with domain‑specific metric!)
@@ -75,102 +480,531 @@ def score(text: str) -> float:
     """Toy metric: the shorter the answer, the higher the score."""
     return -len(text)
 
+
+def score_batch(texts: List[str]) -> np.ndarray:
+    """:func:`score` of every text in one call; replace together with `score()`.
+
+    MH‑C2C scores whole rounds through this.  A vectorised metric that also
+    needs the task's ground truth is bound first, e.g.
+    ``functools.partial(scoring_examples.accuracy_score_batch, ground_truth=ref)``,
+    with ``score`` replaced by the matching per‑text ``accuracy_score``.
+    """
+    return np.fromiter((score(t) for t in texts), dtype=np.float64, count=len(texts))
+
+
+@functools.lru_cache(maxsize=None)
+def _encoder():
+    """tiktoken encoding for STRONG_MODEL, loaded once; None if unavailable."""
+    try:
+        import tiktoken
+        try:
+            return tiktoken.encoding_for_model(STRONG_MODEL)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception:  # not installed, or the BPE table can't be fetched
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """Token count of *text*; without tiktoken, its UTF‑8 byte length (an upper bound)."""
+    enc = _encoder()
+    return len(enc.encode(text)) if enc is not None else len(text.encode())
+
+
+def truncate_tokens(text: str, n_tokens: int) -> str:
+    """Leading part of *text* that fits in *n_tokens*."""
+    enc = _encoder()
+    if enc is None:
+        return text[:n_tokens]  # a character is at least one byte
+    return enc.decode(enc.encode(text)[:n_tokens])
+
+
+def refinement_token_budget(answer: str) -> int:
+    """max_tokens for a rewrite of *answer*; replace together with `score()`.
+
+    Under the toy metric a rewrite much longer than the current answer can
+    only be rejected, so generation is capped near its length (~4 chars per
+    token plus a margin).  Rewrites cut off at the cap are rejected.
+    """
+    return min(REFINE_MAX_TOKENS, max(32, len(answer) // 4 + 16))
+
+
+def score_upper_bound(text_so_far: str) -> float:
+    """Best score any completion of *text_so_far* can reach; replace with `score()`.
+
+    Under the toy metric text only gets longer, so the partial text's own
+    score bounds every completion.
+    """
+    return score(text_so_far)
+
+
+# A streamed rewrite is abandoned once its best possible acceptance
+# probability exp(β·ΔS) drops below exp(MIN_LOG_ALPHA) ≈ 2e-9.
+MIN_LOG_ALPHA = -20.0
+
 # ──────────────────────────────────────────────────────────────────────────────
 # 4. Prompt helpers  (self‑critique • mutual‑critique • refinement)
 # ──────────────────────────────────────────────────────────────────────────────
 
-def self_critique(answer: str) -> str:
-    prompt = (
-        "Here is your answer:\n\n" + answer + "\n\n"
-        "Task: List two specific weaknesses or potential errors and roast this answer."\
-    )
-    return call_llm(prompt)
+# The fixed instructions go first, as system messages, and the variable texts
+# last, so repeated calls share a leading prefix the provider can cache.
+SYSTEM_SELF_CRITIQUE = (
+    "You are reviewing your own answer. "
+    "Task: List two specific weaknesses or potential errors and roast the answer."
+)
+SYSTEM_MUTUAL_CRITIQUE = (
+    "You are an outside expert. You are shown a candidate answer followed by peer answers. "
+    "Task: Identify two flaws in the candidate answer."
+)
+SYSTEM_REFINE = (
+    "You are shown an original answer, a self‑critique and a peer critique of it. "
+    "Task: Rewrite the answer, fully addressing every issue mentioned in the critiques."
+)
 
-def mutual_critique(answer: str, peers: List[str]) -> str:
-    prompt = (
-        "Candidate answer:\n\n" + answer + "\n\n"
-        "Peer answers:\n" + "\n---\n".join(peers) + "\n\n"
-        "Task: As an outside expert, identify two flaws in the candidate above."\
-    )
-    return call_llm(prompt)
-
-def propose_refinement(answer: str, e_self: str, e_mut: str) -> str:
-    prompt = (
-        "Original answer:\n" + answer + "\n\n"
-        "Self‑critique:\n" + e_self + "\n\n"
-        "Peer critique:\n" + e_mut + "\n\n"
-        "Task: Rewrite the answer, fully addressing every issue mentioned above."\
-    )
-    return call_llm(prompt)
+# Output caps per call site: a critique is a couple of points, a rewrite at
+# most a full answer.
+CRITIQUE_MAX_TOKENS = 256
+REFINE_MAX_TOKENS = 768
+PROMPT_OVERHEAD_TOKENS = 256  # system message, headings and separators
+
+def _fit_peers(answer: str,
+               peers: List[str],
+               answer_tokens: int | None = None,
+               peer_tokens: List[int] | None = None) -> List[str]:
+    """Drop or truncate trailing *peers* so a mutual critique fits CONTEXT_WINDOW.
+
+    Known token counts can be passed in; without them the UTF‑8 byte length
+    (a token is at least one byte) settles the common case without encoding.
+    """
+    budget = CONTEXT_WINDOW - CRITIQUE_MAX_TOKENS - PROMPT_OVERHEAD_TOKENS
+    if peer_tokens is None:
+        if len(answer.encode()) + sum(len(p.encode()) for p in peers) <= budget:
+            return peers
+        peer_tokens = [count_tokens(p) for p in peers]
+    room = budget - (count_tokens(answer) if answer_tokens is None else answer_tokens)
+    if sum(peer_tokens) <= room:
+        return peers
+
+    fitted = []
+    for peer, n in zip(peers, peer_tokens):
+        if n > room:
+            if room > 0:
+                fitted.append(truncate_tokens(peer, room))
+            break
+        fitted.append(peer)
+        room -= n
+    return fitted
+
+SYSTEM_RUBRIC = (
+    "You maintain a critique rubric for one category of tasks. You are shown the current "
+    "rubric (possibly empty) and critiques that led to accepted improvements in a new run. "
+    "Task: Summarize the critique patterns that actually improved the answers as short, "
+    "task‑independent bullet points, merged with the current rubric. Reply with the bullets only."
+)
+RUBRIC_TMPL = "Current rubric:\n{rubric}\n\nCritiques behind accepted rewrites:\n{critiques}"
+
+# Rubric for the current run's task category, appended to the critique system
+# messages (after the fixed instructions, so it stays part of the cached prefix)
+_RUBRIC: contextvars.ContextVar[str] = contextvars.ContextVar("mh_c2c_rubric", default="")
+
+def _critique_system(system_msg: str) -> str:
+    rubric = _RUBRIC.get()
+    if not rubric:
+        return system_msg
+    return f"{system_msg}\n\nCritique rubric learned on similar tasks:\n{rubric}"
+
+# User‑turn templates, filled with str.format (one allocation per prompt)
+SELF_TMPL = "Answer:\n\n{answer}"
+MUT_TMPL = "Candidate answer:\n\n{answer}\n\nPeer answers:\n{peers}"
+REF_TMPL = "Original answer:\n{answer}\n\nSelf‑critique:\n{e_self}\n\nPeer critique:\n{e_mut}"
+PEER_SEP = "\n---\n"
+
+# Round‑0 prompts: the task is the shared system prefix, the role the only variable
+SYSTEM_TASK_TMPL = "Solve the problem below as best you can.\n\nProblem:\n{task}"
+ROLE_TMPL = "You are {role}.  Answer:"
+
+async def aself_critique(answer: str) -> str:
+    return await acall_llm(SELF_TMPL.format(answer=answer), _critique_system(SYSTEM_SELF_CRITIQUE),
+                           max_tokens=CRITIQUE_MAX_TOKENS, model=CHEAP_MODEL)
+
+async def amutual_critique(answer: str, peers_text: str) -> str:
+    """Critique *answer* against *peers_text*, the peers fitted by :func:`_fit_peers`
+    and joined with PEER_SEP."""
+    return await acall_llm(MUT_TMPL.format(answer=answer, peers=peers_text), _critique_system(SYSTEM_MUTUAL_CRITIQUE),
+                           max_tokens=CRITIQUE_MAX_TOKENS, model=CHEAP_MODEL)
+
+async def apropose_refinement(answer: str,
+                              e_self: str,
+                              e_mut: str,
+                              beta: float | None = None) -> str | None:
+    """Rewrite of *answer* within its token budget; None if the rewrite was cut off.
+
+    Given the MH inverse temperature *beta*, the rewrite is streamed and
+    abandoned as soon as :func:`score_upper_bound` shows the gate would
+    almost surely reject it.
+    """
+    stop_predicate = None
+    if beta is not None and beta > 0:
+        floor = score(answer) + MIN_LOG_ALPHA / beta
+        stop_predicate = lambda text: score_upper_bound(text) < floor
+    return await acall_llm(REF_TMPL.format(answer=answer, e_self=e_self, e_mut=e_mut), SYSTEM_REFINE,
+                           max_tokens=refinement_token_budget(answer), allow_truncated=False,
+                           stop_predicate=stop_predicate, model=STRONG_MODEL)
+
+class _RoundCalls:
+    """Per‑round memo of in‑flight LLM requests, shared by all agents.
+
+    Agents holding the same text send bit‑identical critique (and often
+    refinement) prompts; each distinct request is issued once and every
+    agent awaits the same task.
+    """
+
+    def __init__(self) -> None:
+        self.tasks: dict = {}
+        self.requested = 0
+        self.issued = 0
+
+    def seed(self, key: tuple, value: str | asyncio.Future) -> None:
+        """Record a known or already requested response.
+
+        E.g. a self‑critique kept across a rejection, or one prefetched for
+        an accepted proposal.
+        """
+        if not isinstance(value, asyncio.Future):
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+            value = future
+        self.tasks[key] = value
+
+    def once(self, key: tuple, make) -> asyncio.Future:
+        self.requested += 1
+        task = self.tasks.get(key)
+        if task is None:
+            self.issued += 1
+            task = self.tasks[key] = asyncio.ensure_future(make())
+        return task
+
+
+async def _arefine(answer: str,
+                   peers_text: str,
+                   calls: _RoundCalls,
+                   beta: float | None = None) -> Tuple[str | None, str, str]:
+    """One agent's critique → refinement step, the two critiques requested
+    together and every request deduplicated through *calls*.
+
+    *beta* enables early abandonment of hopeless rewrites (see
+    :func:`apropose_refinement`).
+
+    Returns (proposal, self‑critique, mutual critique).
+    """
+    e_self = calls.once(("self", answer), lambda: aself_critique(answer))
+    e_mut = calls.once(("mutual", answer, peers_text), lambda: amutual_critique(answer, peers_text))
+    e_self, e_mut = await e_self, await e_mut
+    prop = await calls.once(("refine", answer, e_self, e_mut),
+                            lambda: apropose_refinement(answer, e_self, e_mut, beta))
+    return prop, e_self, e_mut
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 5. Data container + Metropolis gate
 # ──────────────────────────────────────────────────────────────────────────────
 
-@dataclass
+_RNG = np.random.default_rng()
+STALL_LIMIT = 2  # consecutive rejections after which an agent stops proposing
+
+
+@dataclass(slots=True)
 class Chain:
     text: str
     score: float
+    n_tokens: int | None = None  # count_tokens(text), kept while the text is unchanged
 
 
 def mh_accept(old_s: float, new_s: float, beta: float) -> bool:
     """Return True to accept the proposal via Metropolis–Hastings."""
-    delta = new_s - old_s
-    alpha = 1.0 if delta >= 0 else math.exp(beta * delta)
-    return random.random() < alpha
+    return bool(mh_accept_batch(np.array([old_s]), np.array([new_s]), beta)[0])
+
+
+def mh_accept_batch(old_s: np.ndarray,
+                    new_s: np.ndarray,
+                    beta: float | np.ndarray,
+                    rng: np.random.Generator | None = None) -> np.ndarray:
+    """Vectorised :func:`mh_accept` over m chains; returns a boolean mask.
+
+    *beta* may be a scalar or one inverse temperature per chain.
+    """
+    old_s = np.asarray(old_s, dtype=np.float64)
+    delta = np.asarray(new_s, dtype=np.float64) - old_s
+    beta = np.broadcast_to(np.asarray(beta, dtype=np.float64), delta.shape)
+    alpha = np.exp(np.minimum(0.0, beta * delta))   # = min(1, exp(β·ΔS)) without overflow
+    return (rng or _RNG).random(delta.shape) < alpha
 
 # ──────────────────────────────────────────────────────────────────────────────
 # 6. Main MH‑C2C loop
 # ──────────────────────────────────────────────────────────────────────────────
 
-def mh_c2c(task: str,
-           m: int = 3,
-           T: int = 3,
-           beta: float = 1.0,
-           eps: float = 1e-3,
-           roles: List[str] | None = None,
-           verbose: bool = True) -> Chain:
-    """Run MH‑C2C and return the best Chain (answer + score)."""
+PREFETCH_MIN_HIT_RATE = 0.5  # below this, speculative self‑critiques cost more than they save
+
+
+def _discard(task: asyncio.Future | None) -> None:
+    """Drop a speculative request that is no longer needed."""
+    if task is None:
+        return
+    if not task.done():
+        task.cancel()
+    elif not task.cancelled():
+        task.exception()  # mark any failure as retrieved
 
-    roles = roles or [f"Agent {i+1}" for i in range(m)]
 
-    # ── Round 0: independent initial answers
-    chains: List[Chain] = []
-    for r in roles:
-        init = call_llm(f"You are {r}.  Solve the problem below as best you can.\n\n{task}\n\nAnswer:")
-        chains.append(Chain(init, score(init)))
+class _Refinement(NamedTuple):
+    prop: str | None                   # None if truncated or abandoned
+    e_self: str
+    e_mut: str
+    seconds: float
+    prefetched: asyncio.Future | None  # self‑critique of prop, requested early
+
+
+async def _timed_refinement(answer: str,
+                            peers_text: str,
+                            calls: _RoundCalls,
+                            beta: float,
+                            prefetch: bool) -> _Refinement:
+    """Run one agent's refinement and time it.
+
+    With *prefetch*, the self‑critique of the proposal (needed next round if
+    the gate accepts it) is requested as soon as the proposal arrives.
+    """
+    start = time.perf_counter()
+    prop, e_self, e_mut = await _arefine(answer, peers_text, calls, beta)
+    elapsed = time.perf_counter() - start
+    prefetched = None
+    if prefetch and prop is not None:
+        prefetched = asyncio.ensure_future(aself_critique(prop))
+    return _Refinement(prop, e_self, e_mut, elapsed, prefetched)
+
+
+async def _mh_c2c_async(task: str,
+                        m: int,
+                        T: int,
+                        beta: float,
+                        eps: float,
+                        roles: List[str] | None,
+                        verbose: bool,
+                        rng: np.random.Generator,
+                        helpful_critiques: List[str] | None = None) -> Chain:
+    """Async core of :func:`mh_c2c`: all agents of a round refine concurrently.
+
+    The critiques behind every accepted proposal are appended to
+    *helpful_critiques*, if given.
+    """
+
+    roles = roles or [f"Agent {i+1}" for i in range(m)]
+
+    # ── Round 0: independent initial answers, requested together.  The task
+    #    is the shared system prefix; only the role differs between agents.
+    system_task = SYSTEM_TASK_TMPL.format(task=task)
+    init_texts = await asyncio.gather(*[
+        acall_llm(ROLE_TMPL.format(role=r), system_task, model=STRONG_MODEL)
+        for r in roles
+    ])
+    chains: List[Chain] = [Chain(init, s, count_tokens(init))
+                           for init, s in zip(init_texts, score_batch(init_texts).tolist())]
+    # Self‑critique of each chain's current text, seeded into the next
+    # round's request memo: kept across a rejection, since the text (and so
+    # the self‑critique prompt) is then unchanged, or prefetched while the
+    # round was still running for a proposal that got accepted.
+    self_crits: List[str | asyncio.Future | None] = [None] * len(chains)
+    prefetch_on, prefetch_hits, prefetch_total = True, 0, 0
 
     # ── Iterative MH‑C2C refinement
+    # Agents rejected STALL_LIMIT rounds in a row are frozen: they stop
+    # proposing but their texts still serve as peers for the others.
+    stalls = np.zeros(len(chains), dtype=np.int64)
     for t in range(1, T + 1):
+        active = np.flatnonzero(stalls < STALL_LIMIT)
+        if active.size == 0:
+            if verbose:
+                print(f"All agents stalled for {STALL_LIMIT} rounds")
+            break
         if verbose:
             print(f"\n=== ROUND {t} ===")
-        max_delta = 0.0
-
-        for i, chain in enumerate(chains):
-            peers = [c.text for j, c in enumerate(chains) if j != i]
-            e_self = self_critique(chain.text)
-            e_mut  = mutual_critique(chain.text, peers)
-            prop   = propose_refinement(chain.text, e_self, e_mut)
-            new_s  = score(prop)
-
-            if mh_accept(chain.score, new_s, beta):
-                if verbose:
-                    print(f"  + Agent {i+1} accepted (dS={new_s - chain.score:.3f})")
-                max_delta = max(max_delta, abs(new_s - chain.score))
-                chain.text, chain.score = prop, new_s
-            elif verbose:
-                print(f"  - Agent {i+1} rejected (dS={new_s - chain.score:.3f})")
+
+        # Every agent refines against the previous round's texts only, so the
+        # proposals are independent and the round costs one slowest agent.
+        texts = [c.text for c in chains]
+        n_tokens = [c.n_tokens for c in chains]
+        calls = _RoundCalls()
+        for text, e_self in zip(texts, self_crits):
+            if e_self is not None:
+                calls.seed(("self", text), e_self)
+        # Peer sections are joined once per agent; agents whose peer sets coincide
+        # send bit‑identical mutual critique prompts
+        peer_texts = {i: PEER_SEP.join(_fit_peers(texts[i], texts[:i] + texts[i+1:],
+                                                  n_tokens[i], n_tokens[:i] + n_tokens[i+1:]))
+                      for i in active}
+        refinements = await asyncio.gather(*[
+            _timed_refinement(texts[i], peer_texts[i], calls, beta, prefetch_on and t < T)
+            for i in active
+        ])
+        if verbose:
+            slowest = max(range(len(refinements)), key=lambda k: refinements[k].seconds)
+            print(f"  Critical path: Agent {active[slowest]+1} ({refinements[slowest].seconds:.1f}s)")
+            print(f"  Dedup: {calls.issued}/{calls.requested} LLM requests issued")
+
+        # One vectorised MH gate over the active agents' proposals
+        props = [r.prop for r in refinements]
+        for i, r in zip(active, refinements):
+            self_crits[i] = r.e_self
+        old_s = np.array([chains[i].score for i in active], dtype=np.float64)
+        # Truncated or abandoned rewrites score -inf, i.e. are always rejected
+        new_s = np.full(len(props), -np.inf)
+        kept = [k for k, prop in enumerate(props) if prop is not None]
+        if kept:
+            new_s[kept] = score_batch([props[k] for k in kept])
+        accept = mh_accept_batch(old_s, new_s, beta, rng)
+        delta = new_s - old_s
+        max_delta = float(np.abs(delta[accept]).max(initial=0.0))
+
+        for k in np.flatnonzero(accept):
+            i = active[k]
+            chains[i].text, chains[i].score = props[k], float(new_s[k])
+            chains[i].n_tokens = count_tokens(props[k])
+            self_crits[i] = refinements[k].prefetched
+            if helpful_critiques is not None:
+                helpful_critiques.append(refinements[k].e_self)
+                helpful_critiques.append(refinements[k].e_mut)
+        stalls[active] = np.where(accept, 0, stalls[active] + 1)
+
+        if verbose:
+            for i, ok, d in zip(active, accept, delta):
+                print(f"  {'+' if ok else '-'} Agent {i+1} "
+                      f"{'accepted' if ok else 'rejected'} (dS={d:.3f})")
+
+        # Score the speculation: prefetches for rejected proposals are wasted
+        prefetched = [(ok, r.prefetched) for ok, r in zip(accept, refinements) if r.prefetched is not None]
+        for ok, task in prefetched:
+            if not ok:
+                _discard(task)
+        prefetch_total += len(prefetched)
+        prefetch_hits += sum(ok for ok, _ in prefetched)
+        if prefetch_on and prefetch_total >= len(chains) \
+                and prefetch_hits < PREFETCH_MIN_HIT_RATE * prefetch_total:
+            prefetch_on = False
+            if verbose:
+                print(f"  Prefetch disabled (hit rate {prefetch_hits}/{prefetch_total})")
 
         if max_delta < eps:
             if verbose:
                 print(f"Converged: max dS={max_delta:.4f} < eps={eps}")
             break
 
+    for e_self in self_crits:
+        if isinstance(e_self, asyncio.Future):
+            _discard(e_self)
+
     best = max(chains, key=lambda c: c.score)
     if verbose:
+        if prefetch_total:
+            print(f"\nPrefetch hit rate: {prefetch_hits}/{prefetch_total}")
         print(f"\nBest score: {best.score:.3f}\n")
     return best
 
+
+def _rubric_path(category: str) -> Path:
+    safe = re.sub(r"[^\w-]", "_", category)
+    return MEMORIES_DIR / f"{safe}_rubric.txt"
+
+
+def load_rubric(category: str) -> str:
+    """Critique rubric learned for *category* by earlier runs ("" if none yet)."""
+    path = _rubric_path(category)
+    return path.read_text(encoding="utf-8").strip() if path.exists() else ""
+
+
+async def _alearn_rubric(category: str, rubric: str, critiques: List[str]) -> None:
+    """Fold the critiques of a run's accepted rewrites into the category's rubric."""
+    updated = await acall_llm(
+        RUBRIC_TMPL.format(rubric=rubric or "(none)", critiques=PEER_SEP.join(critiques)),
+        SYSTEM_RUBRIC, max_tokens=CRITIQUE_MAX_TOKENS, model=CHEAP_MODEL
+    )
+    path = _rubric_path(category)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(updated + "\n", encoding="utf-8")
+
+
+async def amh_c2c(task: str,
+                  m: int = 3,
+                  T: int = 3,
+                  beta: float = 1.0,
+                  eps: float = 1e-3,
+                  roles: List[str] | None = None,
+                  verbose: bool = True,
+                  seed: int = 0,
+                  use_cache: bool = True,
+                  category: str | None = None,
+                  learn_rubric: bool = False) -> Chain:
+    """Run MH‑C2C on the current event loop and return the best Chain.
+
+    Finished runs are cached on disk, keyed by the task, hyperparameters,
+    model settings, prompt version and *seed* (which also seeds the MH gate).
+    Sampled LLM responses are cached per seed too.  Pass a different seed for
+    a fresh sample, or ``use_cache=False`` to bypass both caches.
+
+    With a task *category*, the critiques use the rubric learned for it in
+    MEMORIES_DIR.  With ``learn_rubric=True`` as well, a run that accepted any
+    rewrite updates that rubric (one extra LLM call).
+    """
+    rubric = load_rubric(category) if category else ""
+    key = None
+    if use_cache and CACHE_ENABLED and _CACHE_ON.get():
+        key = _cache_key(task, m=m, T=T, beta=beta, eps=eps, roles=roles, seed=seed,
+                         models=(CHEAP_MODEL, STRONG_MODEL), temperature=TEMPERATURE,
+                         stall_limit=STALL_LIMIT, rubric=rubric,
+                         chain=Chain.__slots__,  # stored runs are pickled Chains
+                         prompts=PROMPT_VERSION)
+        cached = await asyncio.to_thread(_cache_get, "runs", key)
+        if cached is not None:
+            if verbose:
+                print(f"[cache] Reusing stored MH‑C2C run {key[:12]} (score {cached.score:.3f})")
+            return cached
+
+    helpful_critiques: List[str] | None = [] if category and learn_rubric else None
+    tokens = (_RUBRIC.set(rubric), _CACHE_SCOPE.set(f"mh_c2c:{seed}"),
+              _CACHE_ON.set(_CACHE_ON.get() and use_cache))
+    try:
+        best = await _mh_c2c_async(task, m, T, beta, eps, roles, verbose,
+                                   np.random.default_rng(seed), helpful_critiques)
+        if helpful_critiques:
+            await _alearn_rubric(category, rubric, helpful_critiques)
+            if verbose:
+                print(f"[memory] Updated critique rubric {_rubric_path(category)}")
+    finally:
+        for var, token in zip((_RUBRIC, _CACHE_SCOPE, _CACHE_ON), tokens):
+            var.reset(token)
+    if key is not None:
+        await asyncio.to_thread(_cache_put, "runs", key, best)
+    return best
+
+
+def mh_c2c(task: str,
+           m: int = 3,
+           T: int = 3,
+           beta: float = 1.0,
+           eps: float = 1e-3,
+           roles: List[str] | None = None,
+           verbose: bool = True,
+           seed: int = 0,
+           use_cache: bool = True,
+           category: str | None = None,
+           learn_rubric: bool = False) -> Chain:
+    """Run MH‑C2C and return the best Chain (answer + score).
+
+    Synchronous façade over :func:`amh_c2c`; call that instead from code that
+    already runs an event loop.
+    """
+    return asyncio.run(amh_c2c(task, m=m, T=T, beta=beta, eps=eps, roles=roles,
+                               verbose=verbose, seed=seed, use_cache=use_cache,
+                               category=category, learn_rubric=learn_rubric))
+
 # ──────────────────────────────────────────────────────────────────────────────
 # 7. CLI util
 # ──────────────────────────────────────────────────────────────────────────────
@@ -182,10 +1016,17 @@ def main() -> None:  # pragma: no cover
     parser.add_argument("--T", type=int, default=3, help="Max refinement rounds")
     parser.add_argument("--beta", type=float, default=1.0, help="Inverse temperature β")
     parser.add_argument("--eps", type=float, default=1e-3, help="Convergence threshold ε")
+    parser.add_argument("--seed", type=int, default=0, help="Seed (also selects the cache entry)")
+    parser.add_argument("--no-cache", action="store_true", help="Ignore and don't store cached runs")
+    parser.add_argument("--category", help="Task category; selects a learned critique rubric")
+    parser.add_argument("--learn-rubric", action="store_true",
+                        help="Update the category's rubric from this run's accepted critiques")
     args = parser.parse_args()
 
     best_chain = mh_c2c(task=args.task, m=args.m, T=args.T,
-                        beta=args.beta, eps=args.eps, verbose=True)
+                        beta=args.beta, eps=args.eps, verbose=True,
+                        seed=args.seed, use_cache=not args.no_cache,
+                        category=args.category, learn_rubric=args.learn_rubric)
     print("=== FINAL ANSWER ===\n")
     print(best_chain.text)
 
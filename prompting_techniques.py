@@ -3,44 +3,69 @@ Implementation of various prompting techniques for comparison with MH-C2C.
 Includes ToT, CoT, Self-Consistency, and MH-C2C wrapper.
 """
 
+import asyncio
 import os
 import json
 import random
+import re
+import time
+import numpy as np
 import openai
-from typing import List, Dict, Any
+from collections import Counter
+from typing import List, Dict, Any, Tuple
 from evaluation_framework import PromptingTechnique
-from mh_c_2_c import mh_c2c, Chain, call_llm
+from roast_to_refine import generate_r2r_prompt, get_r2r_config
+from mh_c_2_c import (mh_c2c, amh_c2c, Chain, call_llm, acall_llm, aembed, chat_request,
+                      count_calls, CLIENT, CHEAP_MODEL)
 
 # Import from existing MH-C2C implementation
 from dotenv import load_dotenv
 load_dotenv()
 
+# A rating reply is complete once its leading number is followed by anything else
+_RATING_RE = re.compile(r"\s*(\d+(?:\.\d+)?)")
+_RATING_DONE_RE = re.compile(r"\s*\d+(?:\.\d+)?[^\d.]")
+# R2R replies label their answer "FINAL RESULT" (often as a markdown heading)
+_FINAL_RESULT_RE = re.compile(r"FINAL RESULT\W*", re.IGNORECASE)
+# Self-Consistency samples end with "Final: <answer>" on its own line
+_FINAL_RE = re.compile(r"^\s*\**\bFinal(?:\s+answer)?\**\s*:\**\s*(\S.*?)\s*$",
+                       re.IGNORECASE | re.MULTILINE)
+
 class TreeOfThoughtsTechnique(PromptingTechnique):
     """
     Tree of Thoughts implementation.
     Generates multiple thought paths and selects the best one.
     """
     
+    __slots__ = ("num_thoughts", "depth")
+    
     def __init__(self, num_thoughts: int = 3, depth: int = 2):
         super().__init__("Tree-of-Thoughts")
         self.num_thoughts = num_thoughts
         self.depth = depth
     
-    def solve(self, question: str) -> str:
+    def solve(self, question: str) -> Tuple[str, int]:
         """Solve using Tree of Thoughts approach."""
+        return asyncio.run(self.asolve(question))
+    
+    async def asolve(self, question: str, category: str | None = None) -> Tuple[str, int]:
+        """Solve using Tree of Thoughts, scoring each level's thoughts concurrently."""
         # Step 1: Generate initial thoughts
-        initial_thoughts = self._generate_thoughts(question, "")
+        initial_thoughts = await self._generate_thoughts(question, "")
+        api_calls = 1
         
         # Step 2: Evaluate and expand best thoughts
-        best_path = self._search_best_path(question, initial_thoughts)
+        best_path, search_calls = await self._search_best_path(question, initial_thoughts)
+        api_calls += search_calls
         
         # Step 3: Generate final answer from best path
-        final_answer = self._generate_final_answer(question, best_path)
+        final_answer = await self._generate_final_answer(question, best_path)
+        api_calls += 1
         
-        return final_answer
+        return final_answer, api_calls
     
-    def _generate_thoughts(self, question: str, context: str) -> List[str]:
-        """Generate multiple thoughts for the current step."""
+    async def _generate_thoughts(self, question: str, context: str) -> List[str]:
+        """Generate multiple thoughts for the current step (one API call)."""
         prompt = f"""
 Problem: {question}
 Context: {context}
@@ -54,8 +79,7 @@ Format your response as:
 3. [Third approach]
 """
         
-        response = call_llm(prompt)
-        self.api_calls += 1
+        response = await acall_llm(prompt, max_tokens=384)
         
         # Parse numbered responses
         thoughts = []
@@ -69,12 +93,10 @@ Format your response as:
         
         return thoughts[:self.num_thoughts]
     
-    def _evaluate_thoughts(self, question: str, thoughts: List[str]) -> List[float]:
-        """Evaluate thoughts and return scores."""
-        scores = []
-        
-        for thought in thoughts:
-            prompt = f"""
+    async def _evaluate_thoughts(self, question: str, thoughts: List[str]) -> List[float]:
+        """Evaluate thoughts and return scores (one concurrent API call per thought)."""
+        responses = await asyncio.gather(*[
+            acall_llm(f"""
 Problem: {question}
 Proposed approach: {thought}
 
@@ -84,42 +106,46 @@ Rate this approach on a scale of 1-10 for:
 - Completeness
 
 Provide only a single number (1-10) as your response.
-"""
-            
-            response = call_llm(prompt)
-            self.api_calls += 1
-            
-            try:
-                score = float(response.strip())
-                scores.append(score)
-            except ValueError:
+""", max_tokens=8, stop=["\n"], stream=True, stop_predicate=_RATING_DONE_RE.match, model=CHEAP_MODEL)
+            for thought in thoughts
+        ])
+        
+        scores = []
+        for response in responses:
+            match = _RATING_RE.match(response)
+            if match:
+                scores.append(float(match.group(1)))
+            else:
                 scores.append(5.0)  # Default score
         
         return scores
     
-    def _search_best_path(self, question: str, initial_thoughts: List[str]) -> List[str]:
-        """Search for the best reasoning path."""
+    async def _search_best_path(self, question: str, initial_thoughts: List[str]) -> Tuple[List[str], int]:
+        """Search for the best reasoning path; returns (path, api_calls_made)."""
         current_thoughts = initial_thoughts
         path = []
+        api_calls = 0
         
         for depth in range(self.depth):
             # Evaluate current thoughts
-            scores = self._evaluate_thoughts(question, current_thoughts)
+            scores = await self._evaluate_thoughts(question, current_thoughts)
+            api_calls += len(current_thoughts)
             
             # Select best thought
-            best_idx = scores.index(max(scores))
+            best_idx = int(np.argmax(np.asarray(scores)))
             best_thought = current_thoughts[best_idx]
             path.append(best_thought)
             
             # Generate next level thoughts if not at max depth
             if depth < self.depth - 1:
                 context = " -> ".join(path)
-                current_thoughts = self._generate_thoughts(question, context)
+                current_thoughts = await self._generate_thoughts(question, context)
+                api_calls += 1
         
-        return path
+        return path, api_calls
     
-    def _generate_final_answer(self, question: str, path: List[str]) -> str:
-        """Generate final answer from the best reasoning path."""
+    async def _generate_final_answer(self, question: str, path: List[str]) -> str:
+        """Generate final answer from the best reasoning path (one API call)."""
         reasoning_chain = " -> ".join(path)
         
         prompt = f"""
@@ -129,10 +155,7 @@ Reasoning path: {reasoning_chain}
 Based on this reasoning path, provide a clear, comprehensive final answer.
 """
         
-        response = call_llm(prompt)
-        self.api_calls += 1
-        
-        return response
+        return await acall_llm(prompt, max_tokens=512)
 
 class ChainOfThoughtTechnique(PromptingTechnique):
     """
@@ -140,12 +163,19 @@ class ChainOfThoughtTechnique(PromptingTechnique):
     Encourages step-by-step reasoning.
     """
     
+    __slots__ = ()
+    max_tokens = 512  # Output cap per answer
+    model = None  # Default model (MH_C2C_MODEL)
+    
     def __init__(self):
         super().__init__("Chain-of-Thought")
     
-    def solve(self, question: str) -> str:
-        """Solve using Chain of Thought prompting."""
-        prompt = f"""
+    def params(self) -> Dict[str, Any]:
+        return {**super().params(), "max_tokens": self.max_tokens, "model": self.model}
+    
+    def build_prompt(self, question: str) -> str:
+        """The single prompt this technique sends for *question*."""
+        return f"""
 {question}
 
 Let's think step by step to solve this problem systematically.
@@ -157,11 +187,10 @@ Step 4: Arrive at conclusion
 
 Please work through each step clearly and provide your final answer.
 """
-        
-        response = call_llm(prompt)
-        self.api_calls += 1
-        
-        return response
+    
+    def solve(self, question: str) -> Tuple[str, int]:
+        """Solve using Chain of Thought prompting."""
+        return call_llm(self.build_prompt(question), max_tokens=self.max_tokens, model=self.model), 1
 
 class SelfConsistencyTechnique(PromptingTechnique):
     """
@@ -169,70 +198,238 @@ class SelfConsistencyTechnique(PromptingTechnique):
     Generates multiple CoT responses and selects most common answer.
     """
     
+    __slots__ = ("num_samples",)
+    cluster_threshold = 0.9  # cosine similarity for two final answers to count as one vote
+    
     def __init__(self, num_samples: int = 5):
         super().__init__("Self-Consistency")
         self.num_samples = num_samples
     
-    def solve(self, question: str) -> str:
+    def solve(self, question: str) -> Tuple[str, int]:
         """Solve using Self-Consistency approach."""
-        # Generate multiple reasoning chains
-        responses = []
-        
-        for i in range(self.num_samples):
-            prompt = f"""
+        return asyncio.run(self.asolve(question))
+    
+    async def asolve(self, question: str, category: str | None = None) -> Tuple[str, int]:
+        """Solve using Self-Consistency, sampling all reasoning chains concurrently."""
+        prompt = f"""
 {question}
 
 Let's think step by step to solve this problem. Show your reasoning clearly.
+End your answer with `Final: <answer>` on its own line.
 """
-            
-            response = call_llm(prompt)
-            self.api_calls += 1
-            responses.append(response)
         
-        # For now, return the longest response as it's likely most complete
-        # In a full implementation, you'd extract final answers and vote
-        return max(responses, key=len)
+        # Generate multiple independent reasoning chains
+        # (distinct sample indices keep them independent under the response cache);
+        # only the final answer of each is kept for the vote
+        finals = [self._final_answer(r) for r in await asyncio.gather(*[
+            acall_llm(prompt, sample=i, max_tokens=512) for i in range(self.num_samples)
+        ])]
+        
+        answer, api_calls = await self._vote(finals)
+        return answer, len(finals) + api_calls
+    
+    @staticmethod
+    def _final_answer(response: str) -> str:
+        """The last `Final:` line of a sample, or its last non-empty line."""
+        found = _FINAL_RE.findall(response)
+        if found:
+            return found[-1]
+        lines = [line.strip() for line in response.splitlines() if line.strip()]
+        return lines[-1] if lines else ""
+    
+    async def _vote(self, finals: List[str]) -> Tuple[str, int]:
+        """Majority vote over final answers; returns (answer, extra api_calls).
+        
+        Exact matches are counted first. Only a tie for the top count costs
+        one batched embedding call: answers are grouped by cosine similarity
+        and the medoid of the largest group wins.
+        """
+        # Samples without an answer don't vote (and the embeddings endpoint rejects "")
+        counts = Counter(final for final in finals if final).most_common()
+        if not counts:
+            return "", 0
+        if len(counts) == 1 or counts[0][1] > counts[1][1]:
+            return counts[0][0], 0
+        
+        unique = [text for text, _ in counts]
+        weights = np.array([n for _, n in counts])
+        vecs = await aembed(unique)
+        sims = vecs @ vecs.T
+        close = sims >= self.cluster_threshold
+        # Each answer's cluster: itself plus every answer close to it, weighted by votes
+        support = close @ weights
+        members = close[np.argmax(support)]
+        # Medoid: the member with the highest vote-weighted similarity to the others
+        cohesion = np.where(members, sims[:, members] @ weights[members], -np.inf)
+        return unique[int(np.argmax(cohesion))], 1
 
 class MHC2CTechnique(PromptingTechnique):
     """
     Wrapper for MH-C2C technique to fit evaluation framework.
+    
+    Critiques read the rubric learned for the question's category; only
+    with learn_rubric=True do runs update it, so evaluations stay
+    reproducible and never learn from the test questions by default.
     """
     
-    def __init__(self, m: int = 3, T: int = 2, beta: float = 1.0):
+    __slots__ = ("m", "T", "beta", "learn_rubric")
+    
+    def __init__(self, m: int = 3, T: int = 2, beta: float = 1.0, learn_rubric: bool = False):
         super().__init__("MH-C2C")
         self.m = m
         self.T = T
         self.beta = beta
+        self.learn_rubric = learn_rubric
     
-    def solve(self, question: str) -> str:
+    def solve(self, question: str) -> Tuple[str, int]:
         """Solve using MH-C2C algorithm."""
         # Use the existing mh_c2c function
-        result = mh_c2c(
-            task=question,
-            m=self.m,
-            T=self.T,
-            beta=self.beta,
-            verbose=False  # Disable verbose for cleaner evaluation
-        )
-        
-        # Estimate API calls (rough): m initial + m*T*3 for critiques/refinements
-        self.api_calls = self.m + (self.m * self.T * 3)
+        with count_calls() as calls:
+            result = mh_c2c(
+                task=question,
+                m=self.m,
+                T=self.T,
+                beta=self.beta,
+                verbose=False  # Disable verbose for cleaner evaluation
+            )
         
-        return result.text
+        # Requests actually sent: 0 when the whole run came from the cache
+        return result.text, calls.n
+    
+    async def asolve(self, question: str, category: str | None = None) -> Tuple[str, int]:
+        """Solve using MH-C2C on the caller's event loop (no worker thread)."""
+        with count_calls() as calls:
+            result = await amh_c2c(
+                task=question,
+                m=self.m,
+                T=self.T,
+                beta=self.beta,
+                verbose=False,
+                category=category,
+                learn_rubric=self.learn_rubric
+            )
+        return result.text, calls.n
 
 class BaselineTechnique(PromptingTechnique):
     """
     Simple baseline - direct prompting without special techniques.
     """
     
+    __slots__ = ()
+    max_tokens = 384  # Direct questions need short answers
+    model = CHEAP_MODEL  # Low-stakes direct answers
+    
     def __init__(self):
         super().__init__("Baseline")
     
-    def solve(self, question: str) -> str:
+    def params(self) -> Dict[str, Any]:
+        return {**super().params(), "max_tokens": self.max_tokens, "model": self.model}
+    
+    def build_prompt(self, question: str) -> str:
+        """The single prompt this technique sends for *question*."""
+        return question
+    
+    def solve(self, question: str) -> Tuple[str, int]:
         """Solve using direct prompting."""
-        response = call_llm(question)
-        self.api_calls += 1
-        return response
+        return call_llm(self.build_prompt(question), max_tokens=self.max_tokens, model=self.model), 1
+
+class R2RTechnique(PromptingTechnique):
+    """
+    Roast-to-Refine: the whole multi-agent critique loop in one prompt.
+    A single call instead of MH-C2C's m + m*T*3, for a smaller quality margin.
+    """
+    
+    __slots__ = ("config",)
+    max_tokens = 2048  # Room for every path, roast and refinement round
+    model = None  # Default model (MH_C2C_MODEL)
+    
+    def __init__(self, config: str = "standard"):
+        super().__init__("R2R")
+        self.config = config
+    
+    def params(self) -> Dict[str, Any]:
+        return {**super().params(), "max_tokens": self.max_tokens, "model": self.model}
+    
+    def build_prompt(self, question: str) -> str:
+        """The single prompt this technique sends for *question*."""
+        params = {k: v for k, v in get_r2r_config(self.config).items() if k != "description"}
+        return generate_r2r_prompt(question, **params)
+    
+    @staticmethod
+    def parse_answer(response: str) -> str:
+        """The section after the last "FINAL RESULT" label (the whole reply if unlabelled)."""
+        parts = _FINAL_RESULT_RE.split(response)
+        return parts[-1].strip() if len(parts) > 1 and parts[-1].strip() else response
+    
+    def solve(self, question: str) -> Tuple[str, int]:
+        """Solve with one Roast-to-Refine call."""
+        response = call_llm(self.build_prompt(question), max_tokens=self.max_tokens, model=self.model)
+        return self.parse_answer(response), 1
+
+def batch_solve(techniques: List[PromptingTechnique],
+                questions: List[Dict],
+                poll_interval: float = 30.0) -> Dict[Tuple[str, str], Tuple[str, int]]:
+    """Answer single-prompt techniques through the OpenAI Batch API.
+    
+    Every technique with a build_prompt method contributes one request per
+    question, with its max_tokens and model (replies go through its
+    parse_answer, if it has one); they are submitted as one batch job
+    (billed at about half the synchronous price), polled until it finishes,
+    and routed back by custom_id. Returns {(technique name, question id): (answer, api_calls)}.
+    Multi-call techniques such as MH-C2C depend on their own intermediate
+    answers and are skipped, as are requests the batch failed; callers solve
+    those pairs normally.
+    """
+    requests = {}
+    for technique in techniques:
+        if not hasattr(technique, "build_prompt"):
+            continue
+        for question in questions:
+            custom_id = f"{technique.name}:{question['id']}"
+            requests[custom_id] = (technique, question)
+    if not requests:
+        return {}
+    
+    lines = [
+        json.dumps({
+            "custom_id": custom_id,
+            "method": "POST",
+            "url": "/v1/chat/completions",
+            "body": chat_request(technique.build_prompt(question["question"]),
+                                 max_tokens=technique.max_tokens, model=technique.model)
+        })
+        for custom_id, (technique, question) in requests.items()
+    ]
+    batch_file = CLIENT.files.create(
+        file=("evaluation_batch.jsonl", "\n".join(lines).encode()),
+        purpose="batch"
+    )
+    batch = CLIENT.batches.create(
+        input_file_id=batch_file.id,
+        endpoint="/v1/chat/completions",
+        completion_window="24h"
+    )
+    print(f"Submitted batch {batch.id} with {len(lines)} requests")
+    
+    while batch.status not in ("completed", "failed", "expired", "cancelled"):
+        time.sleep(poll_interval)
+        batch = CLIENT.batches.retrieve(batch.id)
+    print(f"Batch {batch.id} {batch.status}")
+    if batch.output_file_id is None:
+        return {}
+    
+    answers = {}
+    for line in CLIENT.files.content(batch.output_file_id).text.splitlines():
+        record = json.loads(line)
+        response = record.get("response")
+        if record.get("error") or response is None or response["status_code"] != 200:
+            continue
+        technique, question = requests[record["custom_id"]]
+        answer = response["body"]["choices"][0]["message"]["content"].strip()
+        if hasattr(technique, "parse_answer"):
+            answer = technique.parse_answer(answer)
+        answers[(technique.name, question["id"])] = (answer, 1)
+    return answers
 
 # Factory function to create all techniques
 def create_all_techniques() -> List[PromptingTechnique]:
@@ -242,6 +439,7 @@ def create_all_techniques() -> List[PromptingTechnique]:
         ChainOfThoughtTechnique(),
         SelfConsistencyTechnique(num_samples=3),  # Reduced for cost
         TreeOfThoughtsTechnique(num_thoughts=3, depth=2),
+        R2RTechnique(),
         MHC2CTechnique(m=3, T=2, beta=1.0)
     ]
 
@@ -251,8 +449,8 @@ if __name__ == "__main__":
     tot = TreeOfThoughtsTechnique(num_thoughts=2, depth=1)  # Small test
     
     try:
-        answer = tot.solve("Why is the sky blue?")
+        answer, api_calls = tot.solve("Why is the sky blue?")
         print(f"Answer: {answer}")
-        print(f"API calls: {tot.api_calls}")
+        print(f"API calls: {api_calls}")
     except Exception as e:
         print(f"Error: {e}")
\ No newline at end of file
@@ -2,8 +2,10 @@
 Quick test of the evaluation system with reduced scope.
 """
 
+import argparse
+
 from evaluation_framework import EvaluationFramework
-from prompting_techniques import BaselineTechnique, ChainOfThoughtTechnique, MHC2CTechnique
+from prompting_techniques import BaselineTechnique, ChainOfThoughtTechnique, MHC2CTechnique, R2RTechnique, batch_solve
 
 # Simplified test questions
 QUICK_TEST_QUESTIONS = [
@@ -25,6 +27,11 @@ QUICK_TEST_QUESTIONS = [
 
 def main():
     """Run quick evaluation test."""
+    parser = argparse.ArgumentParser(description="Quick evaluation test")
+    parser.add_argument("--batch", action="store_true",
+                        help="Answer single-prompt techniques through the OpenAI Batch API (cheaper, slower)")
+    args = parser.parse_args()
+    
     print("Quick Evaluation Test")
     print("=" * 40)
     
@@ -34,11 +41,12 @@ def main():
     
     framework = EvaluationFramework()
     
-    # Add only 3 techniques for speed
+    # Add only 4 techniques for speed; R2R is the single-call fast lane next to MH-C2C
     techniques = [
         BaselineTechnique(),
         ChainOfThoughtTechnique(), 
-        MHC2CTechnique(m=2, T=1, beta=1.0)  # Reduced parameters
+        R2RTechnique(config="quick"),
+        MHC2CTechnique(m=2, T=1, beta=1.0, learn_rubric=True)  # Reduced parameters; learns rubrics
     ]
     
     for technique in techniques:
@@ -48,7 +56,8 @@ def main():
     print(f"\nTesting {len(techniques)} techniques on {len(QUICK_TEST_QUESTIONS)} questions")
     
     try:
-        report = framework.run_comparison()
+        batched_answers = batch_solve(techniques, QUICK_TEST_QUESTIONS) if args.batch else None
+        report = framework.run_comparison(batched_answers)
         
         print("\n" + "=" * 40)
         print("RESULTS")
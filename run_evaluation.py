@@ -2,20 +2,36 @@
 Main script to run comprehensive evaluation of MH-C2C vs other prompting techniques.
 """
 
-from evaluation_framework import EvaluationFramework, TEST_QUESTIONS
-from prompting_techniques import create_all_techniques
+import argparse
+import asyncio
 import json
 import os
+import sys
 from datetime import datetime
 
 def main():
     """Run the complete evaluation suite."""
+    parser = argparse.ArgumentParser(description="Evaluate MH-C2C against other prompting techniques")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Solve every question again instead of reusing answers from earlier runs")
+    parser.add_argument("--resume", metavar="CHECKPOINT",
+                        help="Continue an interrupted run from its evaluation_results_*.jsonl checkpoint")
+    args = parser.parse_args()
+    
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    checkpoint = args.resume or f"evaluation_results_{timestamp}.jsonl"
+    
+    # Imported only now: they load the OpenAI SDK, numpy and tokenizers, which
+    # --help and argument errors don't need
+    from evaluation_framework import EvaluationFramework, TEST_QUESTIONS
+    from prompting_techniques import create_all_techniques
+    
     print("=" * 60)
     print("MH-C2C vs. Prompting Techniques Evaluation")
     print("=" * 60)
     
     # Initialize framework
-    framework = EvaluationFramework()
+    framework = EvaluationFramework(use_cache=not args.no_cache)
     
     # Add all techniques
     techniques = create_all_techniques()
@@ -28,10 +44,9 @@ def main():
     
     # Run evaluation
     try:
-        report = framework.run_comparison()
+        report = asyncio.run(run_with_shared_client(framework, checkpoint))
         
         # Save results
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"evaluation_results_{timestamp}.json"
         framework.save_results(report, filename)
         
@@ -64,32 +79,44 @@ def main():
         print(f"Evaluation failed: {e}")
         raise
 
+async def run_with_shared_client(framework, checkpoint):
+    """Run the comparison with one async client (and connection pool) shared by
+    every technique, closed when the run ends."""
+    from mh_c_2_c import new_async_client, use_client
+    
+    async with new_async_client() as client:
+        with use_client(client):
+            return await framework.run_comparison_async(concurrency=8, checkpoint=checkpoint)
+
 def generate_insights(report):
     """Generate key insights from the evaluation results."""
     print("\n" + "=" * 60)
     print("KEY INSIGHTS")
     print("=" * 60)
     
-    # Find best technique overall
-    best_technique = min(report.technique_rankings.items(), key=lambda x: x[1])
-    print(f"🏆 Best Overall: {best_technique[0]}")
-    
-    # Find most cost-effective
-    cost_efficiency = {}
+    # Best overall, most cost-effective and fastest, tracked in one pass
+    rankings = report.technique_rankings
+    best_overall = (None, float("inf"))
+    most_efficient = (None, float("-inf"))
+    fastest = (None, float("inf"))
     for technique, stats in report.summary_stats.items():
+        rank = rankings.get(technique, float("inf"))
+        if rank < best_overall[1]:
+            best_overall = (technique, rank)
         if stats['total_cost'] > 0:
             # Composite score / cost
             composite = (stats['avg_accuracy'] + stats['avg_coherence'] + 
-                        stats['avg_completeness'] + stats['avg_creativity']) / 4
-            cost_efficiency[technique] = composite / stats['total_cost']
+                        stats['avg_completeness'] + stats['avg_creativity']) * 0.25
+            efficiency = composite / stats['total_cost']
+            if efficiency > most_efficient[1]:
+                most_efficient = (technique, efficiency)
+        if stats['avg_time'] < fastest[1]:
+            fastest = (technique, stats['avg_time'])
     
-    if cost_efficiency:
-        most_efficient = max(cost_efficiency.items(), key=lambda x: x[1])
+    print(f"🏆 Best Overall: {best_overall[0]}")
+    if most_efficient[0] is not None:
         print(f"💰 Most Cost-Effective: {most_efficient[0]}")
-    
-    # Find fastest
-    fastest = min(report.summary_stats.items(), key=lambda x: x[1]['avg_time'])
-    print(f"⚡ Fastest: {fastest[0]} ({fastest[1]['avg_time']:.1f}s avg)")
+    print(f"⚡ Fastest: {fastest[0]} ({fastest[1]:.1f}s avg)")
     
     # MH-C2C specific analysis
     mhc2c_stats = report.summary_stats.get('MH-C2C')
@@ -110,4 +137,4 @@ def generate_insights(report):
         print(", ".join([f"{metric} ({score:.3f})" for metric, score in best_metrics]))
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    sys.exit(main())
\ No newline at end of file
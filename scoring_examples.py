@@ -3,55 +3,138 @@ Alternative scoring functions for real-world use cases.
 Replace the toy score() function in mh_c2c.py with one of these.
 """
 
-def accuracy_score(text: str, ground_truth: str) -> float:
+from dataclasses import dataclass
+from typing import List, Set, Union
+
+import numpy as np
+
+try:
+    import ahocorasick
+except ImportError:  # pyahocorasick is optional; indicators are then searched one by one
+    ahocorasick = None
+
+# Phrases that mark an answer as obviously false (see factuality_score)
+FALSE_INDICATORS = ('aliens built', 'flat earth', 'vaccines cause')
+
+# One Aho-Corasick automaton finds every indicator in a single pass over the text
+if ahocorasick is not None:
+    _FALSE_AUTOMATON = ahocorasick.Automaton()
+    for _indicator in FALSE_INDICATORS:
+        _FALSE_AUTOMATON.add_word(_indicator, _indicator)
+    _FALSE_AUTOMATON.make_automaton()
+else:
+    _FALSE_AUTOMATON = None
+
+def count_false_indicators(lowered: str) -> int:
+    """Number of distinct FALSE_INDICATORS occurring in already-lowercased text."""
+    if _FALSE_AUTOMATON is not None:
+        return len({indicator for _, indicator in _FALSE_AUTOMATON.iter(lowered)})
+    return sum(1 for indicator in FALSE_INDICATORS if indicator in lowered)
+
+@dataclass(slots=True)
+class Tokens:
+    """Every split of one text the subscores need, computed once by tokenize()."""
+    words: List[str]
+    lower: str
+    lower_words: Set[str]
+    sentences: List[str]                # '.'-separated pieces
+    sentence_word_counts: List[int]
+    n_words: int
+    n_sent: int
+
+def tokenize(text: str) -> Tokens:
+    words = text.split()
+    lower = text.lower()
+    sentences = text.split('.')
+    return Tokens(
+        words=words,
+        lower=lower,
+        lower_words=set(lower.split()),
+        sentences=sentences,
+        sentence_word_counts=[len(s.split()) for s in sentences],
+        n_words=len(words),
+        n_sent=len(sentences),
+    )
+
+def _as_tokens(text: Union[str, Tokens]) -> Tokens:
+    return text if isinstance(text, Tokens) else tokenize(text)
+
+def _token_ids(text: str) -> np.ndarray:
+    """Sorted unique int64 hashes of the lowercased whitespace tokens of *text*."""
+    words = text.lower().split()
+    return np.unique(np.fromiter((hash(w) for w in words), dtype=np.int64, count=len(words)))
+
+def accuracy_score(text: Union[str, Tokens], ground_truth: str) -> float:
     """Score based on similarity to ground truth answer."""
     # Simple word overlap - use semantic similarity for better results
-    text_words = set(text.lower().split())
+    text_words = _as_tokens(text).lower_words
     truth_words = set(ground_truth.lower().split())
     intersection = len(text_words.intersection(truth_words))
     union = len(text_words.union(truth_words))
     return intersection / union if union > 0 else 0.0
 
-def complexity_score(text: str) -> float:
+def accuracy_score_batch(texts: list, ground_truth: str) -> np.ndarray:
+    """accuracy_score of every text against one ground truth.
+    
+    The ground truth is tokenized once; each text becomes a sorted array of
+    token hashes, so the Jaccard overlap is one sorted intersection.
+    Bound to a ground truth with functools.partial, it can replace
+    mh_c_2_c.score_batch.
+    """
+    gt = _token_ids(ground_truth)
+    scores = np.zeros(len(texts))
+    for k, text in enumerate(texts):
+        tokens = _token_ids(text)
+        inter = np.intersect1d(tokens, gt, assume_unique=True).size
+        union = tokens.size + gt.size - inter
+        if union > 0:
+            scores[k] = inter / union
+    return scores
+
+def complexity_score(text: Union[str, Tokens]) -> float:
     """Score based on explanation complexity and depth."""
-    sentences = text.split('.')
-    avg_sentence_length = sum(len(s.split()) for s in sentences) / len(sentences)
+    tok = _as_tokens(text)
+    avg_sentence_length = sum(tok.sentence_word_counts) / tok.n_sent
     return min(avg_sentence_length / 20, 1.0)  # Cap at 1.0
 
-def factuality_score(text: str) -> float:
+def factuality_score(text: Union[str, Tokens]) -> float:
     """Placeholder for factuality scoring using external model."""
     # In practice, use a fact-checking model or API
     # For now, penalize obviously false claims
-    false_indicators = ['aliens built', 'flat earth', 'vaccines cause']
-    penalty = sum(1 for indicator in false_indicators if indicator in text.lower())
+    penalty = count_false_indicators(_as_tokens(text).lower)
     return 1.0 - (penalty * 0.3)
 
-def readability_score(text: str) -> float:
+def readability_score(text: Union[str, Tokens]) -> float:
     """Score based on readability (Flesch Reading Ease approximation)."""
-    words = text.split()
-    sentences = text.split('.')
-    if len(sentences) == 0 or len(words) == 0:
+    if isinstance(text, Tokens):
+        n_words, n_sent = text.n_words, text.n_sent
+    else:
+        # Only counts are needed: no sentence list, and str.count runs in C
+        n_words = len(text.split())
+        n_sent = text.count('.') + 1  # == len(text.split('.'))
+    if n_words == 0:
         return 0.0
     
-    avg_sentence_length = len(words) / len(sentences)
+    avg_sentence_length = n_words / n_sent
     # Simplified readability score
     return max(0, min(1, (30 - avg_sentence_length) / 30))
 
 def composite_score(text: str, ground_truth: str = None) -> float:
-    """Combine multiple scoring metrics."""
+    """Combine multiple scoring metrics (the text is tokenized once for all of them)."""
+    tok = tokenize(text)
     scores = []
     
     # Readability component
-    scores.append(readability_score(text) * 0.3)
+    scores.append(readability_score(tok) * 0.3)
     
     # Complexity component  
-    scores.append(complexity_score(text) * 0.3)
+    scores.append(complexity_score(tok) * 0.3)
     
     # Factuality component
-    scores.append(factuality_score(text) * 0.4)
+    scores.append(factuality_score(tok) * 0.4)
     
     # Accuracy component (if ground truth available)
     if ground_truth:
-        scores.append(accuracy_score(text, ground_truth) * 0.5)
+        scores.append(accuracy_score(tok, ground_truth) * 0.5)
     
     return sum(scores) / len(scores)
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""
+JIT-compiled composite_score from scoring_examples.py.
+
+Tokenization and phrase matching stay in Python and run once per text;
+the arithmetic of all four components runs in one compiled kernel over
+primitive values. Without numba the kernel runs as plain Python and the
+scores are unchanged.
+"""
+
+import numpy as np
+
+from scoring_examples import accuracy_score, count_false_indicators, tokenize
+
+try:
+    from numba import njit
+except ImportError:  # numba is optional; jitted code (here and in evaluation_framework) then runs as plain Python
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+@njit(cache=True)
+def _composite_score_core(sentence_lens: np.ndarray, word_count: int, false_hits: int,
+                          jaccard: float, has_truth: bool) -> float:
+    """composite_score from the words per '.'-separated piece, the total word
+    count, the number of false indicators found and the ground-truth Jaccard."""
+    n_sentences = sentence_lens.shape[0]
+    
+    # Readability: shorter sentences read more easily
+    readability = 0.0
+    if word_count > 0:
+        readability = max(0.0, min(1.0, (30.0 - word_count / n_sentences) / 30.0))
+    
+    # Complexity: longer sentences explain more
+    complexity = min(sentence_lens.sum() / n_sentences / 20.0, 1.0)
+    
+    factuality = 1.0 - false_hits * 0.3
+    
+    total = readability * 0.3 + complexity * 0.3 + factuality * 0.4
+    if has_truth:
+        return (total + jaccard * 0.5) / 4.0
+    return total / 3.0
+
+def composite_score(text: str, ground_truth: str = None) -> float:
+    """Drop-in for scoring_examples.composite_score."""
+    tok = tokenize(text)
+    sentence_lens = np.array(tok.sentence_word_counts, dtype=np.int32)
+    false_hits = count_false_indicators(tok.lower)
+    has_truth = bool(ground_truth)
+    jaccard = accuracy_score(tok, ground_truth) if has_truth else 0.0
+    return _composite_score_core(sentence_lens, tok.n_words, false_hits, jaccard, has_truth)
@@ -3,6 +3,7 @@ Test a single complex question with all techniques to demonstrate MH-C2C perform
 """
 
 from prompting_techniques import BaselineTechnique, ChainOfThoughtTechnique, MHC2CTechnique, TreeOfThoughtsTechnique
+import asyncio
 import time
 
 def test_single_question():
@@ -27,38 +28,43 @@ Show your work step by step."""
         ("MH-C2C", MHC2CTechnique(m=2, T=1, beta=1.0))  # Simplified for speed
     ]
     
-    results = []
-    
-    for name, technique in techniques:
-        print(f"\n{name}:")
-        print("-" * 30)
-        
-        start_time = time.time()
+    async def run_one(name, technique):
+        # Each technique times itself, so its time is unaffected by the others
+        start_time = time.perf_counter()
         try:
-            answer = technique.solve(question)
-            end_time = time.time()
-            
-            print(f"Answer: {answer[:200]}{'...' if len(answer) > 200 else ''}")
-            print(f"Time: {end_time - start_time:.1f}s")
-            print(f"API calls: {technique.api_calls}")
-            
-            results.append({
-                "technique": name,
-                "answer": answer,
-                "time": end_time - start_time,
-                "api_calls": technique.api_calls,
-                "answer_length": len(answer)
-            })
-            
+            answer, api_calls = await technique.asolve(question)
+            elapsed = time.perf_counter() - start_time
         except Exception as e:
+            print(f"\n{name}:")
+            print("-" * 30)
             print(f"ERROR: {e}")
-            results.append({
+            return {
                 "technique": name,
                 "answer": f"ERROR: {e}",
                 "time": 0,
                 "api_calls": 0,
                 "answer_length": 0
-            })
+            }
+        
+        print(f"\n{name}:")
+        print("-" * 30)
+        print(f"Answer: {answer[:200]}{'...' if len(answer) > 200 else ''}")
+        print(f"Time: {elapsed:.1f}s")
+        print(f"API calls: {api_calls}")
+        
+        return {
+            "technique": name,
+            "answer": answer,
+            "time": elapsed,
+            "api_calls": api_calls,
+            "answer_length": len(answer)
+        }
+    
+    async def run_all():
+        return await asyncio.gather(*[run_one(name, technique) for name, technique in techniques])
+    
+    # All techniques run concurrently; results keep the order above
+    results = asyncio.run(run_all())
     
     # Summary comparison
     print("\n" + "=" * 60)
@@ -68,9 +74,14 @@ Show your work step by step."""
     print(f"{'Technique':<20} {'Time (s)':<10} {'API Calls':<12} {'Length':<8}")
     print("-" * 60)
     
-    for result in results:
-        if result["time"] > 0:  # Skip errors
-            print(f"{result['technique']:<20} {result['time']:<10.1f} {result['api_calls']:<12} {result['answer_length']:<8}")
+    # Errored techniques are recorded with time 0; split them off up front
+    ok = [r for r in results if r["time"] > 0]
+    err = [r for r in results if r["time"] == 0]
+    
+    for result in ok:
+        print(f"{result['technique']:<20} {result['time']:<10.1f} {result['api_calls']:<12} {result['answer_length']:<8}")
+    if err:
+        print(f"{len(err)} errored: {[r['technique'] for r in err]}")
     
     print(f"\nGround Truth: Charlie has most with 175 coins")
     print("(Alice: 100, Bob: 50, Charlie: 175 after 3 rounds)")
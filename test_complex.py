@@ -2,6 +2,9 @@
 Test MH-C2C on complex reasoning tasks only.
 """
 
+from collections import defaultdict
+from operator import attrgetter, itemgetter
+
 from evaluation_framework import EvaluationFramework
 from prompting_techniques import BaselineTechnique, ChainOfThoughtTechnique, MHC2CTechnique
 from complex_test_questions import get_complex_questions
@@ -46,16 +49,26 @@ def main():
         
         # Rankings
         print("\nTechnique Rankings:")
-        for technique, rank in sorted(report.technique_rankings.items(), key=lambda x: x[1]):
+        for technique, rank in sorted(report.technique_rankings.items(), key=itemgetter(1)):
             print(f"  {rank}. {technique}")
         
+        # Group results by question in one pass; each group is sorted once, best first
+        by_question = defaultdict(list)
+        mhc2c_results = []
+        for r in report.results:
+            by_question[r.question_id].append(r)
+            if r.technique == "MH-C2C":
+                mhc2c_results.append(r)
+        accuracy_key = attrgetter('accuracy_score')
+        for question_results in by_question.values():
+            question_results.sort(key=accuracy_key, reverse=True)
+        
         # Detailed results for each question
         print("\nDetailed Results by Question:")
         for q in complex_questions:
             print(f"\n{q['id']} ({q['category']}):")
-            question_results = [r for r in report.results if r.question_id == q['id']]
             
-            for result in sorted(question_results, key=lambda x: x.accuracy_score, reverse=True):
+            for result in by_question[q['id']]:
                 print(f"  {result.technique}:")
                 print(f"    Accuracy: {result.accuracy_score:.3f}")
                 print(f"    Coherence: {result.coherence_score:.3f}")
@@ -63,7 +76,6 @@ def main():
                 print(f"    API calls: {result.api_calls}")
         
         # MH-C2C Analysis
-        mhc2c_results = [r for r in report.results if r.technique == "MH-C2C"]
         if mhc2c_results:
             print(f"\nMH-C2C Analysis:")
             avg_accuracy = sum(r.accuracy_score for r in mhc2c_results) / len(mhc2c_results)
@@ -73,7 +85,9 @@ def main():
             print(f"  Average accuracy: {avg_accuracy:.3f}")
             print(f"  Average time per question: {avg_time:.1f}s")
             print(f"  Total API calls: {total_calls}")
-            print(f"  Questions where MH-C2C ranked #1: {sum(1 for q in complex_questions if max([r for r in report.results if r.question_id == q['id']], key=lambda x: x.accuracy_score).technique == 'MH-C2C')}")
+            mhc2c_wins = sum(1 for q in complex_questions
+                             if by_question[q['id']] and by_question[q['id']][0].technique == 'MH-C2C')
+            print(f"  Questions where MH-C2C ranked #1: {mhc2c_wins}")
         
     except Exception as e:
         print(f"Test failed: {e}")